@@ -1,13 +1,19 @@
 import pandas as pd
-from mlxtend.frequent_patterns import apriori, association_rules
+from mlxtend.frequent_patterns import apriori
+from basket import create_basket_df
+from ingest import outlier_limits
+from rule_index import as_rule_index, recommend_batch, BATCH_CHUNK
+from catalog import as_catalog
+from son import son
+from rules import generate_rules
+from topk import top_k_itemsets
+from condensed import condensed_itemsets
+from profiling import tracer
 
 def outlier_thresholds(dataframe, variable):
     quartile1 = dataframe[variable].quantile(0.01)
     quartile3 = dataframe[variable].quantile(0.99)
-    interquantile_range = quartile3 - quartile1
-    up_limit = quartile3 + 1.5 * interquantile_range
-    low_limit = quartile1 - 1.5 * interquantile_range
-    return low_limit, up_limit
+    return outlier_limits(quartile1, quartile3)
 
 def replace_with_thresholds(dataframe, variable):
     low_limit, up_limit = outlier_thresholds(dataframe, variable)
@@ -16,13 +22,18 @@ def replace_with_thresholds(dataframe, variable):
 
 def create_invoice_product_df(dataframe, id=False):
     if id:
-        return dataframe.groupby(['Invoice', "StockCode"])['Quantity'].sum().unstack().fillna(0). \
-            applymap(lambda x: 1 if x > 0 else 0)
+        return create_basket_df(dataframe, item_col='StockCode')
     else:
-        return dataframe.groupby(['Invoice', 'Description'])['Quantity'].sum().unstack().fillna(0). \
-            applymap(lambda x: 1 if x > 0 else 0)
+        return create_basket_df(dataframe, item_col='Description')
 
-def preprocessData(df):
+def preprocessData(df, country="Germany"):
+    # country=None keeps every country
+    with tracer.stage('preprocessData', rows=len(df)) as stage:
+        basket_df = _preprocess(df, country)
+        stage['invoices'], stage['products'] = basket_df.shape
+    return basket_df
+
+def clean_transactions(df):
     df.dropna(inplace=True)
     # Delete if the product name contains "POST":
     df = df[~df["Description"].str.contains("POST", na=False)]
@@ -33,71 +44,102 @@ def preprocessData(df):
         replace_with_thresholds(df, col)
 
     df = df[(df["Quantity"] > 0) & (df["Price"] > 0)]
-    df_germany = df[df["Country"] == "Germany"]
-    gr_inv_pro_df = create_invoice_product_df(df_germany, id=True)
-    
+    return df
+
+def _preprocess(df, country):
+    df = clean_transactions(df)
+    if country is not None:
+        df = df[df["Country"] == country]
+    with tracer.stage('encode', rows=len(df)):
+        gr_inv_pro_df = create_invoice_product_df(df, id=True)
+
     return gr_inv_pro_df
 
 def check_id(data, product_id):
     # Find Product name with Stock Code
-    product_name = data[data["StockCode"] == product_id]["Description"].values[0]
+    product_name = as_catalog(data).name(product_id)
     return product_id, product_name
 
-def runApriori(data, minSupport, minConfidence):
+def runApriori(data, minSupport, minConfidence, n_jobs=1, minLift=None, mode="all"):
     # gr_inv_pro_df = preprocessData(data)
 
-    frequent_itemsets = apriori(data, min_support=minSupport, use_colnames=True)
-    
-    rules = association_rules(frequent_itemsets, metric="support",num_itemsets=len(frequent_itemsets), min_threshold=minConfidence)
+    support_of = None
+    with tracer.stage('mining', invoices=len(data)) as stage:
+        if mode != "all":
+            # "closed" / "maximal" keep only the non-redundant itemsets; rules are generated
+            # from those, with the supports of left-out subsets recovered on demand
+            frequent_itemsets, support_of = condensed_itemsets(data, minSupport, mode)
+        elif n_jobs == 1:
+            frequent_itemsets = apriori(data, min_support=minSupport, use_colnames=True)
+        else:
+            # Partitioned (SON) mining over a process pool; n_jobs=-1 uses every core
+            frequent_itemsets = son(data, 'apriori', min_support=minSupport, use_colnames=True, n_jobs=n_jobs)
+        stage['itemsets'] = len(frequent_itemsets)
+
+    with tracer.stage('rules') as stage:
+        rules = generate_rules(frequent_itemsets, min_confidence=minConfidence, min_lift=minLift, support_of=support_of)
+        stage['rules'] = len(rules)
+
+    with tracer.stage('sort', rules=len(rules)):
+        sorted_rules = rules.sort_by("confidence", ascending=False)
+    return frequent_itemsets, sorted_rules
 
-    sorted_rules = rules.sort_values("confidence", ascending=False)
+def runAprioriTopK(data, k, minConfidence, by="itemsets", minSupport=0.0):
+    # Top-K mode: K bounds the work instead of a min_support guess. by="itemsets" keeps
+    # the K most frequent itemsets; by="rules" mines the K most frequent itemsets of two
+    # or more products and returns the K highest-confidence rules among them.
+    min_len = 2 if by == "rules" else 1
+    with tracer.stage('mining', invoices=len(data), k=k) as stage:
+        frequent_itemsets = top_k_itemsets(data, k, min_len=min_len, min_support=minSupport, use_colnames=True)
+        stage['itemsets'] = len(frequent_itemsets)
+    with tracer.stage('rules') as stage:
+        rules = generate_rules(frequent_itemsets, min_confidence=minConfidence, top_k=k if by == "rules" else None)
+        stage['rules'] = len(rules)
+    with tracer.stage('sort', rules=len(rules)):
+        sorted_rules = rules.sort_by("confidence", ascending=False)
     return frequent_itemsets, sorted_rules
 
 def to_str_results(frequent_itemsets, rules):
     itemsets_str = []
     rules_str = []
 
-    for _, row in frequent_itemsets.iterrows():
-        itemsets_str.append(f"itemset: {set(row['itemsets'])}, support: {row['support']:.3f}")
+    for itemset, support in zip(frequent_itemsets['itemsets'], frequent_itemsets['support']):
+        itemsets_str.append(f"itemset: {set(itemset)}, support: {support:.3f}")
 
-    for _, row in rules.iterrows():
-        antecedents = set(row['antecedents'])
-        consequents = set(row['consequents'])
-        confidence = row['confidence']
-        support = row['support']
+    for antecedents, consequents, support, confidence in zip(rules['antecedents'], rules['consequents'], rules['support'], rules['confidence']):
+        antecedents = set(antecedents)
+        consequents = set(consequents)
         rules_str.append(f"Rule: {antecedents} ==> {consequents},support : {support:.3f}, confidence: {confidence:.3f}")
 
     return itemsets_str, rules_str
 
-def recommendation_system(input_products, num_of_products, rules_df):    
-    recommendations = []
-
-    for _, rule in rules_df.iterrows():
-        antecedents = set(rule['antecedents'])
-        consequents = rule['consequents']
-        confidence = rule['confidence']
-        
-        if antecedents.issubset(set(input_products)):
-            for consequent in consequents:
-                recommendations.append((consequent, confidence))
-                
-    # Sort by confidence and return the top N recommendations and drop duplicates and keep the highest confidence
-    recommendations = sorted(recommendations, key=lambda x: x[1], reverse=True)
-    unique_recommendations = {}
-    for product, confidence in recommendations:
-        if product not in unique_recommendations:
-            unique_recommendations[product] = confidence
-    recommendations = [(product, confidence) for product, confidence in unique_recommendations.items()]
-    return recommendations[:num_of_products]
-
-def recommendation_system_func(df, input_products, num_of_products, sorted_rules):    
+def recommendation_system(input_products, num_of_products, rules_df):
+    # rules_df may be a sorted rules DataFrame or a RuleIndex built from it once
+    with tracer.stage('recommendation', inputs=len(input_products)) as stage:
+        recommendations = as_rule_index(rules_df).recommend(input_products, num_of_products)
+        stage['recommendations'] = len(recommendations)
+    return recommendations
+
+def recommendation_system_batch(baskets, num_of_products, rules_df, chunk_size=BATCH_CHUNK, n_jobs=1):
+    # Every basket of a create_invoice_product_df style frame at once, as a
+    # (basket, product, score) table; see rule_index.recommend_batch
+    with tracer.stage('batch_recommendation', baskets=len(baskets)) as stage:
+        recommendations = recommend_batch(rules_df, baskets, num_of_products, chunk_size=chunk_size, n_jobs=n_jobs)
+        stage['recommendations'] = len(recommendations)
+    return recommendations
+
+def recommendation_system_func(df, input_products, num_of_products, sorted_rules):
+    # df may be the raw retail frame or a ProductCatalog built from it once
+    catalog = as_catalog(df)
     recommendations = recommendation_system(input_products, num_of_products, sorted_rules)
-    result = []
-
-    for product_id, confidence in recommendations:
-        if product_id in df['StockCode'].values:
-            product_name = df[df['StockCode'] == product_id]['Description'].values[0]
-            result.append({'ProductID': product_id, 'ProductName': product_name, 'Confidence': confidence})
-    
-    result_df = pd.DataFrame(result)
-    return result_df if not result_df.empty else "No recommendations found"
\ No newline at end of file
+    if not recommendations:
+        return "No recommendations found"
+
+    product_ids, confidences = zip(*recommendations)
+    known = catalog.contains(product_ids)
+    result_df = pd.DataFrame({
+        'ProductID': product_ids,
+        'ProductName': catalog.lookup(product_ids),
+        'Confidence': confidences,
+    })[known].reset_index(drop=True)
+    return result_df if not result_df.empty else "No recommendations found"
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def _sum_cells(invoice_codes, item_codes, quantities, n_items):
+    # Collapse (invoice, item) code pairs to unique cells with their summed quantity
+    cells = invoice_codes.astype(np.int64) * n_items + item_codes
+    cells, inverse = np.unique(cells, return_inverse=True)
+    totals = np.bincount(inverse, weights=np.asarray(quantities, dtype=np.float64), minlength=len(cells))
+    rows, cols = np.divmod(cells, n_items)
+    return rows, cols, totals
+
+
+def _cells_to_matrix(rows, cols, totals, n_invoices, n_items):
+    # Keep the cells whose summed quantity is positive, same as the old "1 if x > 0 else 0"
+    positive = totals > 0
+    return sparse.csr_matrix(
+        (np.ones(positive.sum(), dtype=bool), (rows[positive], cols[positive])),
+        shape=(n_invoices, n_items),
+    )
+
+
+def _drop_missing(invoices, items, quantities):
+    # Rows with a missing invoice or item are left out, as groupby(dropna=True) does;
+    # otherwise factorize would code them -1 and they would land in a neighbouring cell
+    invoices, items = np.asarray(invoices), np.asarray(items)
+    if quantities is None:
+        quantities = np.ones(len(invoices))
+    keep = ~(pd.isna(invoices) | pd.isna(items))
+    if keep.all():
+        return invoices, items, quantities
+    return invoices[keep], items[keep], np.asarray(quantities)[keep]
+
+
+def encode_baskets(invoices, items, quantities=None):
+    # Factorize (Invoice, item) pairs to integer codes and sum quantities per cell
+    # with a single bincount, so no Python code runs per basket cell.
+    invoices, items, quantities = _drop_missing(invoices, items, quantities)
+    invoice_codes, invoice_labels = pd.factorize(invoices, sort=True)
+    item_codes, item_labels = pd.factorize(items, sort=True)
+    n_invoices, n_items = len(invoice_labels), len(item_labels)
+
+    rows, cols, totals = _sum_cells(invoice_codes, item_codes, quantities, max(n_items, 1))
+    matrix = _cells_to_matrix(rows, cols, totals, n_invoices, n_items)
+    return matrix, invoice_labels, item_labels
+
+
+class BasketEncoder:
+    # Incremental version of encode_baskets for data that arrives in batches. Each batch
+    # is collapsed to its distinct (invoice, item) cells straight away, so memory grows
+    # with the size of the basket matrix rather than with the number of raw rows.
+
+    def __init__(self):
+        self.invoice_codes = {}
+        self.item_codes = {}
+        self._rows = []
+        self._cols = []
+        self._totals = []
+
+    @staticmethod
+    def _global_codes(labels, table):
+        local_codes, uniques = pd.factorize(np.asarray(labels))
+        codes = np.array([table.setdefault(label, len(table)) for label in uniques], dtype=np.int64)
+        return local_codes, codes
+
+    def partial_fit(self, invoices, items, quantities=None):
+        invoices, items, quantities = _drop_missing(invoices, items, quantities)
+        invoice_local, invoice_codes = self._global_codes(invoices, self.invoice_codes)
+        item_local, item_codes = self._global_codes(items, self.item_codes)
+        rows, cols, totals = _sum_cells(invoice_local, item_local, quantities, max(len(item_codes), 1))
+        self._rows.append(invoice_codes[rows])
+        self._cols.append(item_codes[cols])
+        self._totals.append(totals)
+        return self
+
+    @staticmethod
+    def _sorted_labels(table):
+        # Relabel codes so rows and columns come out sorted, like encode_baskets
+        labels = pd.Index(list(table), dtype=object)
+        order = labels.argsort()
+        rank = np.empty(len(labels), dtype=np.int64)
+        rank[order] = np.arange(len(labels))
+        return labels[order].to_numpy(), rank
+
+    def to_matrix(self):
+        invoice_labels, invoice_rank = self._sorted_labels(self.invoice_codes)
+        item_labels, item_rank = self._sorted_labels(self.item_codes)
+        n_invoices, n_items = len(invoice_labels), len(item_labels)
+        if self._rows:
+            rows = invoice_rank[np.concatenate(self._rows)]
+            cols = item_rank[np.concatenate(self._cols)]
+            # An invoice split across batches contributes several partial cells; sum them
+            rows, cols, totals = _sum_cells(rows, cols, np.concatenate(self._totals), max(n_items, 1))
+        else:
+            rows = cols = np.empty(0, dtype=np.int64)
+            totals = np.empty(0)
+        return _cells_to_matrix(rows, cols, totals, n_invoices, n_items), invoice_labels, item_labels
+
+    def to_df(self, index_name='Invoice', columns_name='StockCode'):
+        matrix, invoice_labels, item_labels = self.to_matrix()
+        return basket_matrix_to_df(matrix, invoice_labels, item_labels, index_name=index_name, columns_name=columns_name)
+
+
+def basket_matrix_to_df(matrix, invoice_labels, item_labels, index_name='Invoice', columns_name=None):
+    basket_df = pd.DataFrame.sparse.from_spmatrix(
+        matrix,
+        index=pd.Index(invoice_labels, name=index_name),
+        columns=pd.Index(item_labels, name=columns_name),
+    )
+    return basket_df
+
+
+def basket_matrix(basket_df):
+    # Return the CSR matrix behind a basket frame, whether it is sparse or dense
+    if hasattr(basket_df, 'sparse'):
+        return basket_df.sparse.to_coo().tocsr().astype(bool)
+    return sparse.csr_matrix(basket_df.to_numpy() > 0)
+
+
+def create_basket_df(dataframe, item_col='StockCode'):
+    matrix, invoice_labels, item_labels = encode_baskets(
+        dataframe['Invoice'].to_numpy(),
+        dataframe[item_col].to_numpy(),
+        dataframe['Quantity'].to_numpy(),
+    )
+    return basket_matrix_to_df(matrix, invoice_labels, item_labels, columns_name=item_col)
+
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+else:
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        bytes_ = words.view(np.uint8).reshape(words.shape[:-1] + (-1,))
+        return _BYTE_COUNTS[bytes_].sum(axis=-1, dtype=np.int64)
+
+
+def item_bitmaps(matrix):
+    # One row of packed 64-bit words per item; bit t is set when invoice t contains the item
+    coo = matrix.tocoo()
+    n_words = (matrix.shape[0] + 63) // 64
+    bitmaps = np.zeros((matrix.shape[1], n_words), dtype=np.uint64)
+    rows = coo.row.astype(np.uint64)
+    np.bitwise_or.at(
+        bitmaps,
+        (coo.col, (rows >> np.uint64(6)).astype(np.int64)),
+        np.left_shift(np.uint64(1), rows & np.uint64(63)),
+    )
+    return bitmaps
@@ -0,0 +1,188 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import mlxtend
+from mlxtend.frequent_patterns import apriori, fpgrowth
+
+from fp_growth import preprocessData, recommendation_system
+from eclat import eclat
+from son import son
+from rules import generate_rules
+from rule_index import RuleIndex
+
+ENGINES = {
+    'apriori': lambda data, support: apriori(data, min_support=support, use_colnames=True),
+    'fpgrowth': lambda data, support: fpgrowth(data, min_support=support, use_colnames=True),
+    'eclat': lambda data, support: eclat(data, min_support=support, use_colnames=True),
+    'son-fpgrowth': lambda data, support: son(data, 'fpgrowth', min_support=support, use_colnames=True, n_jobs=-1),
+}
+
+
+def quest_transactions(n_transactions=10_000, n_items=1_000, avg_basket_len=10, n_patterns=200,
+                       avg_pattern_len=4, correlation=0.5, corruption=0.5, seed=0):
+    # IBM Quest style generator (Agrawal & Srikant): baskets are filled from a pool of
+    # weighted "potentially frequent" patterns that partly overlap and get corrupted,
+    # then written out as raw retail rows so preprocessData can be timed as well.
+    rng = np.random.default_rng(seed)
+    patterns = []
+    for _ in range(n_patterns):
+        size = min(max(1, rng.poisson(avg_pattern_len)), n_items)
+        shared = patterns[-1][:int(min(len(patterns[-1]), size) * rng.exponential(correlation))] if patterns else []
+        fresh = rng.choice(n_items, size=max(size - len(shared), 0), replace=False)
+        patterns.append(list(dict.fromkeys(list(shared) + list(fresh))))
+    weights = rng.exponential(1.0, n_patterns)
+    weights /= weights.sum()
+    noise = np.clip(rng.normal(corruption, 0.1, n_patterns), 0, 1)
+    # Baskets can hold no more distinct items than the patterns cover between them
+    n_reachable = len(set().union(*patterns))
+
+    invoices, items = [], []
+    for t in range(n_transactions):
+        target = min(max(1, rng.poisson(avg_basket_len)), n_reachable)
+        basket = set()
+        while len(basket) < target:
+            p = rng.choice(n_patterns, p=weights)
+            kept = [item for item in patterns[p] if rng.random() >= noise[p]]
+            basket.update(kept or patterns[p][:1])
+        invoices.extend([str(500_000 + t)] * len(basket))
+        items.extend(basket)
+
+    n_rows = len(invoices)
+    stock_codes = np.array([f"{20_000 + item}" for item in items])
+    return pd.DataFrame({
+        'Invoice': invoices,
+        'StockCode': stock_codes,
+        'Description': np.char.add('ITEM ', stock_codes),
+        'Quantity': rng.integers(1, 24, n_rows),
+        'InvoiceDate': pd.Timestamp('2011-01-01') + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D'),
+        'Price': rng.choice([0.42, 0.85, 1.25, 2.1, 4.95], n_rows),
+        'Customer ID': rng.integers(12_000, 18_000, n_rows).astype(np.float64),
+        'Country': 'Germany',
+    })
+
+
+def read_retail_csv():
+    basket_df = pd.read_csv('online_retail_II_preprocessed.csv', dtype={'Invoice': str}).set_index('Invoice')
+    return basket_df.astype(bool)
+
+
+def quest_from_spec(spec, seed=0):
+    # "quest:<transactions>:<items>:<avg basket length>"
+    _, n_transactions, n_items, basket_len = spec.split(':')
+    return quest_transactions(int(n_transactions), int(n_items), int(basket_len), seed=seed)
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _timed(stages, name, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    stages[name] = {'seconds': time.perf_counter() - start, 'peak_rss_mb': _peak_rss_mb()}
+    return result
+
+
+def run_case(dataset, engine, min_support, min_confidence, n_queries, seed):
+    stages = {}
+    # The bundled CSV is already one-hot, so its "preprocess" stage is just the load
+    if dataset == 'retail':
+        data = _timed(stages, 'preprocess', read_retail_csv)
+    else:
+        data = _timed(stages, 'preprocess', preprocessData, quest_from_spec(dataset, seed))
+    frequent_itemsets = _timed(stages, 'mining', ENGINES[engine], data, min_support)
+    rules = _timed(stages, 'rules', generate_rules, frequent_itemsets, min_confidence)
+    index = _timed(stages, 'rule_index', RuleIndex, rules)
+
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, data.shape[0], n_queries) if data.shape[0] else []
+    baskets = [list(data.columns[data.iloc[row].to_numpy(dtype=bool)]) for row in rows]
+    _timed(stages, 'recommendation', lambda: [recommendation_system(basket, 10, index) for basket in baskets])
+    stages['recommendation']['per_query_ms'] = stages['recommendation']['seconds'] / max(len(baskets), 1) * 1000
+
+    return {
+        'n_transactions': int(data.shape[0]),
+        'n_items': int(data.shape[1]),
+        'n_itemsets': len(frequent_itemsets),
+        'n_rules': len(rules),
+        'stages': stages,
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+def _case_worker(queue, args):
+    try:
+        queue.put({'status': 'ok', **run_case(*args)})
+    except Exception as e:
+        queue.put({'status': 'error', 'error': repr(e)})
+
+
+def run_isolated(args, timeout):
+    # A fresh process per case gives every case its own peak RSS and lets a blow-up time out
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_case_worker, args=(queue, args))
+    process.start()
+    try:
+        return queue.get(timeout=timeout)
+    except Exception:
+        return {'status': 'timeout'}
+    finally:
+        process.join(1)
+        if process.is_alive():
+            process.terminate()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark mining engines across support levels and data sizes")
+    parser.add_argument('--datasets', nargs='+', default=['retail', 'quest:10000:1000:10'],
+                        help="'retail' or 'quest:<transactions>:<items>:<avg basket length>'")
+    parser.add_argument('--engines', nargs='+', default=['apriori', 'fpgrowth', 'eclat'], choices=sorted(ENGINES))
+    parser.add_argument('--supports', nargs='+', type=float, default=[0.1, 0.05, 0.03, 0.02, 0.01])
+    parser.add_argument('--min-confidence', type=float, default=0.01)
+    parser.add_argument('--queries', type=int, default=200, help="recommendation queries per case")
+    parser.add_argument('--timeout', type=float, default=600, help="seconds allowed per case")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='-', help="JSON output path, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    for dataset in args.datasets:
+        for engine in args.engines:
+            for support in args.supports:
+                case = {'dataset': dataset, 'engine': engine, 'min_support': support, 'min_confidence': args.min_confidence}
+                outcome = run_isolated((dataset, engine, support, args.min_confidence, args.queries, args.seed), args.timeout)
+                results.append({**case, **outcome})
+                print(f"{dataset} {engine} min_support={support}: {outcome['status']}", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'mlxtend': mlxtend.__version__,
+            'cpu_count': os.cpu_count(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(payload)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from basket import basket_matrix, basket_matrix_to_df
+
+# Part of every mining key; bump it when the meaning or layout of cached results changes
+RESULTS_VERSION = 2
+
+
+class ResultCache:
+    # Content-addressed on-disk cache. Each entry is a directory named by the hash of
+    # its key; the directory mtime records the last access and drives LRU eviction
+    # once the total size goes over max_bytes.
+
+    def __init__(self, directory='.retail_cache', max_bytes=1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(*parts):
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def file_hash(self, path):
+        # Hashing a large workbook is not free, so remember the digest per (size, mtime)
+        stat = os.stat(path)
+        signature = [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+        memo_path = os.path.join(self.directory, 'file_hashes.json')
+        try:
+            with open(memo_path) as f:
+                memo = json.load(f)
+        except (OSError, ValueError):
+            memo = {}
+        memo_key = json.dumps(signature)
+        if memo_key in memo:
+            return memo[memo_key]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        memo[memo_key] = digest.hexdigest()
+        self._write_json(memo_path, memo)
+        return memo[memo_key]
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _open_entry(self, key):
+        path = self._entry_path(key)
+        if not os.path.isdir(path):
+            return None
+        os.utime(path)
+        return path
+
+    def _commit_entry(self, key, write):
+        # Write into a scratch directory first so readers never see a half-written entry
+        scratch = tempfile.mkdtemp(dir=self.directory, prefix='.tmp-')
+        try:
+            write(scratch)
+            target = self._entry_path(key)
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+            os.replace(scratch, target)
+        finally:
+            if os.path.isdir(scratch):
+                shutil.rmtree(scratch)
+        self.evict()
+
+    def load_dataset(self, key):
+        path = self._open_entry(key)
+        if path is None:
+            return None
+        matrix = sparse.load_npz(os.path.join(path, 'basket.npz'))
+        with np.load(os.path.join(path, 'labels.npz'), allow_pickle=True) as labels:
+            basket_df = basket_matrix_to_df(
+                matrix, labels['invoices'], labels['items'],
+                index_name=labels['index_name'].item(), columns_name=labels['columns_name'].item(),
+            )
+        catalog = pd.read_pickle(os.path.join(path, 'catalog.pkl'))
+        sample = pd.read_pickle(os.path.join(path, 'sample.pkl'))
+        return basket_df, catalog, sample
+
+    def save_dataset(self, key, basket_df, catalog, sample):
+        def write(path):
+            sparse.save_npz(os.path.join(path, 'basket.npz'), basket_matrix(basket_df))
+            np.savez(
+                os.path.join(path, 'labels.npz'),
+                invoices=basket_df.index.to_numpy(), items=basket_df.columns.to_numpy(),
+                index_name=np.array(basket_df.index.name, dtype=object),
+                columns_name=np.array(basket_df.columns.name, dtype=object),
+            )
+            pd.to_pickle(catalog, os.path.join(path, 'catalog.pkl'))
+            pd.to_pickle(sample, os.path.join(path, 'sample.pkl'))
+        self._commit_entry(key, write)
+
+    def load_results(self, key):
+        path = self._open_entry(key)
+        if path is None:
+            return None
+        frequent_itemsets = pd.read_pickle(os.path.join(path, 'itemsets.pkl'))
+        rules = pd.read_pickle(os.path.join(path, 'rules.pkl'))
+        return frequent_itemsets, rules
+
+    def save_results(self, key, frequent_itemsets, rules):
+        def write(path):
+            pd.to_pickle(frequent_itemsets, os.path.join(path, 'itemsets.pkl'))
+            pd.to_pickle(rules, os.path.join(path, 'rules.pkl'))
+        self._commit_entry(key, write)
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = self._entry_path(name)
+            if name.startswith('.') or not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            entries.append((os.stat(path).st_mtime_ns, size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    @staticmethod
+    def _write_json(path, payload):
+        scratch = path + '.tmp'
+        with open(scratch, 'w') as f:
+            json.dump(payload, f)
+        os.replace(scratch, path)
+
+
+def cached_mining(cache, dataset_key, engine, run_func, data, minSupport, minConfidence):
+    key = cache.key(RESULTS_VERSION, dataset_key, engine, minSupport, minConfidence)
+    cached = cache.load_results(key)
+    if cached is not None:
+        return cached
+    frequent_itemsets, sorted_rules = run_func(data, minSupport, minConfidence)
+    cache.save_results(key, frequent_itemsets, sorted_rules)
+    return frequent_itemsets, sorted_rules
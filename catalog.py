@@ -0,0 +1,40 @@
+import pandas as pd
+
+
+class ProductCatalog:
+    # StockCode -> Description table built once from the raw retail frame.
+    # Like the old df[df["StockCode"] == id] scans, the first row of each StockCode wins.
+
+    def __init__(self, dataframe):
+        first_rows = dataframe.drop_duplicates('StockCode')
+        self.names = pd.Series(
+            first_rows['Description'].to_numpy(),
+            index=pd.Index(first_rows['StockCode'].to_numpy(), name='StockCode'),
+            name='Description',
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, product_id):
+        return product_id in self.names.index
+
+    @property
+    def product_ids(self):
+        return self.names.index.to_numpy()
+
+    def name(self, product_id):
+        return self.names.at[product_id]
+
+    def contains(self, product_ids):
+        return self.names.index.get_indexer(pd.Index(product_ids)) >= 0
+
+    def lookup(self, product_ids):
+        # Vectorized name lookup; ids missing from the catalog map to NaN
+        return self.names.reindex(pd.Index(product_ids)).to_numpy()
+
+
+def as_catalog(data):
+    if isinstance(data, ProductCatalog):
+        return data
+    return ProductCatalog(data)
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from mlxtend.frequent_patterns import fpmax
+
+from basket import basket_matrix, item_bitmaps, popcount
+from son import count_bitmap_candidates
+
+MODES = ('all', 'closed', 'maximal')
+
+
+def _closure(bitmaps, tids):
+    # Every item contained in all invoices of tids
+    return np.flatnonzero(((bitmaps & tids) == tids).all(axis=1))
+
+
+def _extend(itemset, tids, core, bitmaps, n_rows, min_support, found):
+    # LCM prefix-preserving closure extension: each closed itemset is reached from
+    # exactly one parent, so no closed set is generated twice or checked for duplicates.
+    outside = np.ones(len(bitmaps), dtype=bool)
+    outside[itemset] = False
+    candidates = np.flatnonzero(outside)
+    candidates = candidates[candidates > core]
+    if len(candidates) == 0:
+        return
+    joined = bitmaps[candidates] & tids
+    joined_counts = popcount(joined)
+    keep = joined_counts / n_rows >= min_support
+    for item, item_tids, count in zip(candidates[keep], joined[keep], joined_counts[keep]):
+        closed = _closure(bitmaps, item_tids)
+        # The closure may not add an item ordered before the extension item
+        if np.array_equal(closed[closed < item], itemset[itemset < item]):
+            found.append((count, closed))
+            _extend(closed, item_tids, item, bitmaps, n_rows, min_support, found)
+
+
+def closed_itemsets(df, min_support=0.5, use_colnames=False):
+    # Frequent itemsets with no superset of equal support. They keep every support:
+    # a frequent itemset has the support of its smallest closed superset.
+    matrix = basket_matrix(df)
+    n_rows = matrix.shape[0]
+    bitmaps = item_bitmaps(matrix)
+    frequent = np.flatnonzero(popcount(bitmaps) / n_rows >= min_support)
+    bitmaps = bitmaps[frequent]
+
+    every_row = sparse.csr_matrix(np.ones((n_rows, 1), dtype=bool))
+    tids = item_bitmaps(every_row)[0]
+    root = _closure(bitmaps, tids)
+    found = [(n_rows, root)] if len(root) else []
+    _extend(root, tids, -1, bitmaps, n_rows, min_support, found)
+
+    columns = df.columns if use_colnames else range(df.shape[1])
+    return pd.DataFrame({
+        'support': np.array([count for count, _ in found], dtype=np.float64) / n_rows,
+        'itemsets': [frozenset(columns[i] for i in frequent[itemset]) for _, itemset in found],
+    })
+
+
+class ClosedSupport:
+    # Support of any frequent itemset from the closed itemsets alone: the highest
+    # support among the closed itemsets that contain it. NaN when none does.
+
+    def __init__(self, closed):
+        itemsets = list(closed['itemsets'])
+        self.supports = closed['support'].to_numpy(dtype=np.float64)
+        items = pd.unique(np.array([item for itemset in itemsets for item in itemset], dtype=object))
+        self.codes = {item: code for code, item in enumerate(items)}
+        self.members = self._incidence(itemsets).T.tocsr()
+
+    def _incidence(self, itemsets):
+        rows = [i for i, itemset in enumerate(itemsets) for _ in itemset]
+        columns = [self.codes.get(item, -1) for itemset in itemsets for item in itemset]
+        rows, columns = np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64)
+        known = columns >= 0
+        return sparse.csr_matrix(
+            (np.ones(known.sum(), dtype=np.int32), (rows[known], columns[known])),
+            shape=(len(itemsets), len(self.codes)),
+        )
+
+    def __call__(self, itemsets):
+        sizes = np.array([len(itemset) for itemset in itemsets])
+        shared = (self._incidence(itemsets) @ self.members).tocoo()
+        contains = shared.data == sizes[shared.row]
+        best = np.full(len(itemsets), -np.inf)
+        np.maximum.at(best, shared.row[contains], self.supports[shared.col[contains]])
+        best[np.isinf(best)] = np.nan
+        return best
+
+
+class CountedSupport:
+    # Exact supports counted on the invoices, for maximal itemsets: their subsets'
+    # supports cannot be recovered from the itemsets themselves.
+
+    def __init__(self, df):
+        matrix = basket_matrix(df)
+        self.n_rows = matrix.shape[0]
+        self.bitmaps = item_bitmaps(matrix)
+        self.codes = {item: code for code, item in enumerate(df.columns)}
+
+    def __call__(self, itemsets):
+        candidates = [tuple(self.codes[item] for item in itemset) for itemset in itemsets]
+        return count_bitmap_candidates(self.bitmaps, candidates) / self.n_rows
+
+
+def condensed_itemsets(df, min_support, mode):
+    # (itemsets, support_of) for a condensed mining mode; support_of recovers the
+    # support of subsets that the condensed table leaves out
+    if mode == 'closed':
+        itemsets = closed_itemsets(df, min_support=min_support, use_colnames=True)
+        return itemsets, ClosedSupport(itemsets)
+    if mode == 'maximal':
+        return fpmax(df, min_support=min_support, use_colnames=True), CountedSupport(df)
+    raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+MIN_SUPPORT = 0.06
+MIN_CONFIDENCE = 0.3
+
+
+@pytest.fixture(scope='module')
+def baskets():
+    # 1200 invoices over 12 products with a few strongly co-bought groups, so there are
+    # itemsets of length three and more and rules on both sides of the confidence cut
+    rng = np.random.default_rng(0)
+    matrix = rng.random((1200, 12)) < np.linspace(0.08, 0.45, 12)
+    matrix[:, 1] |= matrix[:, 0] & (rng.random(1200) < 0.8)
+    matrix[:, 2] |= matrix[:, 1] & (rng.random(1200) < 0.6)
+    matrix[:, 5] |= matrix[:, 4] & (rng.random(1200) < 0.7)
+    index = pd.Index([f"{invoice:06d}" for invoice in range(1200)], name='Invoice')
+    return pd.DataFrame(matrix, index=index, columns=[f"P{item:02d}" for item in range(12)])
+
+
+def supports(frequent_itemsets):
+    return dict(zip(frequent_itemsets['itemsets'], frequent_itemsets['support']))
+
+
+def assert_same_itemsets(actual, expected):
+    actual, expected = supports(actual), supports(expected)
+    assert set(actual) == set(expected)
+    for itemset, support in expected.items():
+        assert actual[itemset] == pytest.approx(support)
+
+
+def rule_metrics(rules):
+    frame = rules if isinstance(rules, pd.DataFrame) else rules.to_frame()
+    return {
+        (frozenset(antecedents), frozenset(consequents)): (support, confidence, lift)
+        for antecedents, consequents, support, confidence, lift in zip(
+            frame['antecedents'], frame['consequents'], frame['support'], frame['confidence'], frame['lift'])
+    }
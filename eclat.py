@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from basket import basket_matrix, item_bitmaps, popcount
+from rules import generate_rules
+# Share the preprocessing and recommendation helpers so this module is a drop-in for fp_growth
+from fp_growth import preprocessData, check_id, to_str_results, recommendation_system_func
+
+
+def _mine_class(prefix, items, bitmaps, counts, n_rows, min_support, max_len, found):
+    for i in range(len(items)):
+        itemset = prefix + (items[i],)
+        found.append((counts[i], itemset))
+        if i + 1 == len(items) or (max_len and len(itemset) >= max_len):
+            continue
+        # Intersect the tidset of this item with every later item of the class at once
+        joined = bitmaps[i + 1:] & bitmaps[i]
+        joined_counts = popcount(joined)
+        keep = joined_counts / n_rows >= min_support
+        if keep.any():
+            _mine_class(itemset, items[i + 1:][keep], joined[keep], joined_counts[keep],
+                        n_rows, min_support, max_len, found)
+
+
+def eclat_bitmaps(bitmaps, n_rows, min_support=0.5, max_len=None):
+    # Eclat over packed item bitmaps: (count, item positions) for every frequent itemset
+    counts = popcount(bitmaps)
+    frequent = np.flatnonzero(counts / n_rows >= min_support)
+    # Growing classes from the rarest items keeps the intersected tidsets small
+    frequent = frequent[np.argsort(counts[frequent], kind='stable')]
+
+    found = []
+    _mine_class((), frequent, bitmaps[frequent], counts[frequent], n_rows, min_support, max_len, found)
+    return found
+
+
+def eclat(df, min_support=0.5, use_colnames=False, max_len=None):
+    matrix = basket_matrix(df)
+    n_rows = matrix.shape[0]
+    found = eclat_bitmaps(item_bitmaps(matrix), n_rows, min_support, max_len)
+
+    columns = df.columns if use_colnames else range(df.shape[1])
+    itemsets = [frozenset(columns[i] for i in itemset) for _, itemset in found]
+    supports = np.array([count for count, _ in found], dtype=np.float64) / n_rows
+    return pd.DataFrame({'support': supports, 'itemsets': itemsets})
+
+
+def run_eclat(data, minSupport, minConfidence, minLift=None):
+    frequent_itemsets = eclat(data, min_support=minSupport, use_colnames=True)
+    rules = generate_rules(frequent_itemsets, min_confidence=minConfidence, min_lift=minLift)
+    sorted_rules = rules.sort_by("confidence", ascending=False)
+    return frequent_itemsets, sorted_rules
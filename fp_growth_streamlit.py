@@ -1,7 +1,17 @@
 import streamlit as st
 import pandas as pd
 from mlxtend.frequent_patterns import fpgrowth
-from fp_growth import run_fpgrowth, to_str_results, recommendation_system_func, preprocessData, check_id
+from fp_growth import run_fpgrowth, run_fpgrowth_topk, recommendation_system_func, preprocessData, check_id
+from rule_index import RuleIndex
+from result_view import ResultView, ITEMSET_SORT_KEYS, RULE_SORT_KEYS
+from catalog import ProductCatalog
+from cache import ResultCache, cached_mining
+from results_store import MiningResultsStore
+from profiling import Tracer, tracer, use_tracer
+
+DATA_PATH = 'online_retail_II.xlsx'
+SHEET_NAME = 'Year 2010-2011'
+result_cache = ResultCache()
 
 # Initialize session state variables
 if 'clicks' not in st.session_state:
@@ -9,8 +19,8 @@ if 'clicks' not in st.session_state:
 
 if 'sorted_rules' not in st.session_state:
     st.session_state['sorted_rules'] = None
-    st.session_state['items'] = None
-    st.session_state['rules'] = None
+    st.session_state['rule_index'] = None
+    st.session_state['result_view'] = None
 
 # Helper functions to handle button clicks
 def run_fp_growth_click():
@@ -25,6 +35,25 @@ def run_recommendation_click():
 def reset_recommendation_click():
     st.session_state.clicks['run_recommendation'] = False
 
+def load_dataset():
+    # Reuse the preprocessed basket matrix and catalog unless the workbook changed
+    dataset_key = result_cache.key(result_cache.file_hash(DATA_PATH), SHEET_NAME, 'preprocessData', 'Germany')
+    cached = result_cache.load_dataset(dataset_key)
+    if cached is None:
+        with tracer.stage('read_excel') as stage:
+            df = pd.read_excel(DATA_PATH, sheet_name=SHEET_NAME)
+            stage['rows'] = len(df)
+        df['StockCode'] = df['StockCode'].astype(str)
+        df['Invoice'] = df['Invoice'].astype(str)
+        sample = df.head(15).copy()
+
+        # Preprocess the dataset
+        dataset = preprocessData(df)
+        catalog = ProductCatalog(df)
+        result_cache.save_dataset(dataset_key, dataset, catalog, sample)
+        cached = dataset, catalog, sample
+    return cached + (dataset_key,)
+
 def main():
     st.markdown("# FP Growth Algorithm")
 
@@ -50,17 +79,24 @@ def main():
     """)
 
 
+    # Opt-in stage profiling; records cover the current script run only. Each session
+    # has its own Tracer, which `tracer` follows for this run, so sessions never share records
+    if 'tracer' not in st.session_state:
+        st.session_state['tracer'] = Tracer()
+    use_tracer(st.session_state['tracer'])
+    profile = st.sidebar.checkbox("Profile stages", key='profile_checkbox')
+    if profile and not tracer.enabled:
+        tracer.enable()
+    elif not profile and tracer.enabled:
+        tracer.disable()
+    tracer.clear()
+
     # Load and display the dataset
     try:
-        df = pd.read_excel('online_retail_II.xlsx', sheet_name='Year 2010-2011')
-        df['StockCode'] = df['StockCode'].astype(str)
-        df['Invoice'] = df['Invoice'].astype(str)
+        dataset, catalog, sample, dataset_key = load_dataset()
         st.write("### Sample Data")
-        st.write(df.head(15))
+        st.write(sample)
 
-        # Preprocess the dataset
-        dataset = preprocessData(df)
-        
     except FileNotFoundError:
         st.error("The dataset file 'online_retail_II.xlsx' was not found. Please check the file path.")
         st.stop()
@@ -71,18 +107,42 @@ def main():
     with st.form(key='fp_growth_form'):
         support = st.slider("Minimum Support Value", min_value=0.0, max_value=1.00, value=0.05, key='support_slider')
         confidence = st.slider("Minimum Confidence Value", min_value=0.0, max_value=1.00, value=0.01, key='confidence_slider')
+        top_k = st.number_input("Top-K (0 = use Minimum Support)", min_value=0, max_value=10000, value=0, step=10, key='top_k_input',
+                                help="Mine the K most frequent itemsets of two or more products and keep the K "
+                                     "highest-confidence rules among them. Minimum Support is ignored.")
+        mode = st.selectbox("Itemsets", ("all", "closed", "maximal"), key='mode_select')
         submit_button = st.form_submit_button(label='Run FP Growth ', on_click=run_fp_growth_click)
 
-    # Run the FP Growth algorithm if the button was clicked
-    if st.session_state.clicks.get('run_fpgrowth', False):
+    # Run the FP Growth algorithm when the form is submitted with new inputs. Other widgets
+    # (pages, sorting, recommendations) rerun the script too and reuse the stored results.
+    results_key = (dataset_key, support, confidence, top_k, mode)
+    if st.session_state.clicks.get('run_fpgrowth', False) and st.session_state.get('results_key') != results_key:
         try:
-            items, sorted_rules = run_fpgrowth(dataset, support, confidence)
-            i, r = to_str_results(items, sorted_rules)
-
-            # Store results in session state
+            if top_k:
+                # Top-K mode bounds the run by K instead of the support slider
+                items, sorted_rules = cached_mining(result_cache, dataset_key, f'fpgrowth-top{top_k}',
+                    lambda data, s, c: run_fpgrowth_topk(data, top_k, c, by="rules"), dataset, 0.0, confidence)
+            elif mode != "all":
+                # Closed / maximal tables are not filter-compatible across supports, so skip the store
+                items, sorted_rules = cached_mining(result_cache, dataset_key, f'fpgrowth-{mode}',
+                    lambda data, s, c: run_fpgrowth(data, s, c, mode=mode), dataset, support, confidence)
+            else:
+                # Slider moves above the lowest support mined so far are answered by filtering
+                if st.session_state.get('results_store_key') != dataset_key:
+                    st.session_state['results_store'] = MiningResultsStore(
+                        lambda data, s, c: cached_mining(result_cache, dataset_key, 'fpgrowth', run_fpgrowth, data, s, c))
+                    st.session_state['results_store_key'] = dataset_key
+                items, sorted_rules = st.session_state['results_store'].query(dataset, support, confidence)
+
+            # Store results in session state; the view formats only the page on screen
             st.session_state['sorted_rules'] = sorted_rules
-            st.session_state['items'] = i
-            st.session_state['rules'] = r
+            with tracer.stage('rule_index', rules=len(sorted_rules)):
+                st.session_state['rule_index'] = RuleIndex(sorted_rules)
+            st.session_state['result_view'] = ResultView(items, sorted_rules)
+            st.session_state['results_key'] = results_key
+            # The new result may have fewer pages; drop the page inputs so both restart at 1
+            st.session_state.pop('itemset_page', None)
+            st.session_state.pop('rule_page', None)
 
             st.success("FP Growth Algorithm completed successfully.")
         except Exception as e:
@@ -90,23 +150,36 @@ def main():
 
     # Display results if FP Growth was run
     if st.session_state.clicks.get('run_fpgrowth', False):
-        if st.session_state['items'] is not None and st.session_state['rules'] is not None:
+        view = st.session_state['result_view']
+        if view is not None:
             st.markdown("## LIST OF FREQUENT ITEMSETS AND ASSOCIATION RULES")
-            st.markdown(f"### min_support: {support}  min_confidence: {confidence}")
+            if top_k:
+                # Top-K runs ignore the support slider, so show what K limits instead
+                st.markdown(f"### Top-K mode: K = {top_k}  min_confidence: {confidence}")
+                st.caption(f"Minimum Support is not used. Itemsets are the {top_k} most frequent of two or more "
+                           f"products (with their subsets); rules are the {top_k} highest-confidence rules among them.")
+            else:
+                st.markdown(f"### min_support: {support}  min_confidence: {confidence}")
             st.markdown("### Generating Association Rules from Frequent Itemsets")
-            st.write(f"Number of frequent itemsets: {len(st.session_state['items'])}")
-            st.write(pd.DataFrame(st.session_state['items']).head(10))
-            
+            st.write(f"Number of frequent itemsets: {view.n_itemsets}")
+            itemset_sort = st.selectbox("Sort itemsets by", ITEMSET_SORT_KEYS, key='itemset_sort')
+            itemset_page = st.number_input("Itemsets page", min_value=1, max_value=view.n_pages(view.n_itemsets, 10),
+                                           value=1, key='itemset_page')
+            st.write(view.itemsets_page(itemset_page - 1, 10, sort_by=itemset_sort))
+
             st.markdown("### Association Rules")
-            st.write(f"Number of association rules: {len(st.session_state['rules'])}")
-            st.write(pd.DataFrame(st.session_state['rules']).head(10))
+            st.write(f"Number of association rules: {view.n_rules}")
+            rule_sort = st.selectbox("Sort rules by", RULE_SORT_KEYS, key='rule_sort')
+            rule_page = st.number_input("Rules page", min_value=1, max_value=view.n_pages(view.n_rules, 10),
+                                        value=1, key='rule_page')
+            st.write(view.rules_page(rule_page - 1, 10, sort_by=rule_sort))
 
     # Product Recommendation Section
     st.markdown('---')
     st.markdown("### Recommend Products based on a Product ID and association rules")
     
     with st.form(key='recommendation_form'):
-        product_ids = st.multiselect("Select products for recommendation", list(df["StockCode"].unique()))
+        product_ids = st.multiselect("Select products for recommendation", list(catalog.product_ids))
         num_of_products_input = st.slider("Number of recommendations", min_value=1, max_value=30, value=5)
         submit_recommendation = st.form_submit_button(label='Run Recommendation', on_click=run_recommendation_click)
 
@@ -114,12 +187,12 @@ def main():
         # Generate recommendations if Apriori was run
         if st.session_state.clicks.get('run_fpgrowth', False):
             try:
-                recommended_products = recommendation_system_func(df, product_ids, num_of_products_input, st.session_state['sorted_rules'])
+                recommended_products = recommendation_system_func(catalog, product_ids, num_of_products_input, st.session_state['rule_index'])
 
                 st.markdown("#### Recommended Products with id and name:")
                 if not recommended_products.empty:
                     for id in product_ids : 
-                        product_id, product_name = check_id(df, id)
+                        product_id, product_name = check_id(catalog, id)
                         st.markdown(f"##### {product_id} -  {product_name}")
                     st.table(recommended_products)
                 else:
@@ -129,6 +202,11 @@ def main():
         else:
             st.warning("Please run the FP Growth algorithm first to get recommendations.")
 
+    if profile:
+        st.sidebar.markdown("*PROFILE*")
+        st.sidebar.dataframe(tracer.to_frame())
+        st.sidebar.download_button("Download trace (JSON)", tracer.to_json(), file_name='trace.json')
+
 if __name__ == "__main__":
     main()
 
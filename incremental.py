@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from mlxtend.frequent_patterns import fpgrowth
+
+from basket import basket_matrix
+from son import count_candidates, LOCAL_SUPPORT_SLACK
+from rules import generate_rules
+
+
+class IncrementalMiner:
+    # FUP-style maintenance of the frequent itemsets of a growing invoice history.
+    # The basket matrix and the support count of every frequent itemset are kept, so a
+    # batch of new (and expired) invoices only requires:
+    #   - counting the known itemsets inside the batch,
+    #   - mining the batch alone for itemsets that might have become frequent,
+    #   - counting just those new candidates against the stored history.
+    # An itemset that was not frequent can only become frequent if its count inside the
+    # added invoices exceeds minSupport * (added - expired); when more invoices expire
+    # than arrive there is no such bound and the history is mined again.
+
+    def __init__(self, data, minSupport, minConfidence):
+        self.minSupport = minSupport
+        self.minConfidence = minConfidence
+        self.items = list(data.columns)
+        self.item_codes = {item: code for code, item in enumerate(self.items)}
+        self.invoices = data.index
+        self.matrix = basket_matrix(data)
+        self.counts = {}
+        self._mine_all()
+
+    def _mine_all(self):
+        n_rows = self.matrix.shape[0]
+        self.counts = {}
+        if n_rows == 0:
+            return
+        mined = fpgrowth(pd.DataFrame.sparse.from_spmatrix(self.matrix), min_support=self.minSupport)
+        for support, itemset in zip(mined['support'], mined['itemsets']):
+            self.counts[tuple(sorted(itemset))] = int(round(support * n_rows))
+
+    def _encode(self, new_data):
+        # Map the batch columns onto the item dictionary, growing it for unseen products
+        for item in new_data.columns:
+            if item not in self.item_codes:
+                self.item_codes[item] = len(self.items)
+                self.items.append(item)
+        columns = np.array([self.item_codes[item] for item in new_data.columns], dtype=np.int64)
+        batch = basket_matrix(new_data).tocoo()
+        return sparse.csr_matrix(
+            (batch.data, (batch.row, columns[batch.col])),
+            shape=(batch.shape[0], len(self.items)), dtype=bool,
+        )
+
+    def update(self, new_data=None, expired_invoices=None):
+        n_items_before = self.matrix.shape[1]
+        added = self._encode(new_data) if new_data is not None else sparse.csr_matrix((0, n_items_before), dtype=bool)
+        self.matrix.resize((self.matrix.shape[0], len(self.items)))
+
+        expired = np.zeros(self.matrix.shape[0], dtype=bool)
+        if expired_invoices is not None:
+            expired = self.invoices.isin(list(expired_invoices))
+        removed = self.matrix[expired]
+        self.matrix = sparse.vstack([self.matrix[~expired], added], format='csr')
+        new_invoices = new_data.index if new_data is not None else pd.Index([])
+        self.invoices = self.invoices[~expired].append(new_invoices)
+
+        n_added, n_removed = added.shape[0], removed.shape[0]
+        if n_added == 0 and n_removed == 0:
+            return self.results()
+        if n_removed >= n_added:
+            self._mine_all()
+            return self.results()
+
+        # Known itemsets: adjust their counts by the batch only
+        known = list(self.counts)
+        delta = count_candidates(added, known) - count_candidates(removed, known)
+        counts = {itemset: count + change for (itemset, count), change in zip(self.counts.items(), delta)}
+
+        # Itemsets frequent enough inside the batch to possibly have crossed the threshold
+        batch_support = self.minSupport * (n_added - n_removed) / n_added * (1 - LOCAL_SUPPORT_SLACK)
+        local = fpgrowth(pd.DataFrame.sparse.from_spmatrix(added), min_support=batch_support)
+        candidates = [itemset for itemset in (tuple(sorted(s)) for s in local['itemsets']) if itemset not in counts]
+        if candidates:
+            counts.update(zip(candidates, count_candidates(self.matrix, candidates)))
+
+        n_rows = self.matrix.shape[0]
+        self.counts = {itemset: count for itemset, count in counts.items() if count / n_rows >= self.minSupport}
+        return self.results()
+
+    def frequent_itemsets(self):
+        n_rows = self.matrix.shape[0]
+        ordered = sorted(self.counts, key=lambda itemset: (len(itemset), itemset))
+        return pd.DataFrame({
+            'support': np.array([self.counts[itemset] for itemset in ordered], dtype=np.float64) / max(n_rows, 1),
+            'itemsets': [frozenset(self.items[code] for code in itemset) for itemset in ordered],
+        })
+
+    def results(self):
+        frequent_itemsets = self.frequent_itemsets()
+        rules = generate_rules(frequent_itemsets, min_confidence=self.minConfidence)
+        return frequent_itemsets, rules.sort_by("confidence", ascending=False)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+from basket import BasketEncoder
+
+# Read the identifier columns as text, like the apps do with astype(str) after read_excel
+RETAIL_DTYPES = {'Invoice': str, 'StockCode': str, 'Description': str, 'Country': str}
+# The int64/float64 columns preprocessData clips on the retail schema ("Customer ID" is skipped)
+OUTLIER_COLUMNS = ('Quantity', 'Price')
+
+
+def read_chunks(path, chunksize=100_000, **read_csv_kwargs):
+    return pd.read_csv(path, chunksize=chunksize, dtype=RETAIL_DTYPES, **read_csv_kwargs)
+
+
+def drop_invalid_rows(chunk):
+    # Same row filters preprocessData applies before computing outlier thresholds
+    chunk = chunk.dropna()
+    chunk = chunk[~chunk["Description"].str.contains("POST", na=False)]
+    chunk = chunk[~chunk["Invoice"].str.contains("C", na=False)]
+    return chunk
+
+
+class ValueCountSketch:
+    # Exact quantiles in bounded memory: keeps one count per distinct value, which for
+    # quantities and unit prices is tiny compared with the number of rows.
+
+    def __init__(self):
+        self.counts = pd.Series(dtype=np.int64)
+
+    def update(self, values):
+        counts = pd.Series(values).value_counts()
+        self.counts = self.counts.add(counts, fill_value=0).astype(np.int64)
+
+    def quantile(self, q):
+        # Linear interpolation between order statistics, as Series.quantile does; NaN
+        # when no value was seen (e.g. every row of the file was filtered out)
+        if self.counts.empty:
+            return np.nan
+        counts = self.counts.sort_index()
+        cumulative = np.cumsum(counts.to_numpy())
+        position = q * (cumulative[-1] - 1)
+        lower, upper = int(np.floor(position)), int(np.ceil(position))
+        values = counts.index.to_numpy(dtype=np.float64)
+        neighbours = values[np.searchsorted(cumulative, [lower, upper], side='right')]
+        return np.quantile(neighbours, position - lower)
+
+
+def outlier_limits(quartile1, quartile3):
+    # Clipping limits 1.5 ranges outside the 1% / 99% quantiles, shared with preprocessData
+    interquantile_range = quartile3 - quartile1
+    up_limit = quartile3 + 1.5 * interquantile_range
+    low_limit = quartile1 - 1.5 * interquantile_range
+    return low_limit, up_limit
+
+
+def sketch_thresholds(sketch):
+    return outlier_limits(sketch.quantile(0.01), sketch.quantile(0.99))
+
+
+def scan_thresholds(path, columns=OUTLIER_COLUMNS, chunksize=100_000, **read_csv_kwargs):
+    # First pass: outlier thresholds for every column without holding the file in memory
+    sketches = {col: ValueCountSketch() for col in columns}
+    for chunk in read_chunks(path, chunksize, **read_csv_kwargs):
+        chunk = drop_invalid_rows(chunk)
+        for col in columns:
+            sketches[col].update(chunk[col].to_numpy())
+    return {col: sketch_thresholds(sketch) for col, sketch in sketches.items()}
+
+
+def clean_chunk(chunk, thresholds, country="Germany"):
+    chunk = drop_invalid_rows(chunk)
+    for col, (low_limit, up_limit) in thresholds.items():
+        chunk = chunk.assign(**{col: chunk[col].clip(low_limit, up_limit)})
+    chunk = chunk[(chunk["Quantity"] > 0) & (chunk["Price"] > 0)]
+    if country is not None:
+        chunk = chunk[chunk["Country"] == country]
+    return chunk
+
+
+def iter_basket_batches(path, thresholds, country="Germany", item_col='StockCode', chunksize=100_000, **read_csv_kwargs):
+    # Second pass: yield (invoices, items, quantities) arrays made of whole baskets. The
+    # last invoice of a chunk may continue in the next one, so it is held back until then.
+    carry = None
+    for chunk in read_chunks(path, chunksize, **read_csv_kwargs):
+        chunk = clean_chunk(chunk, thresholds, country)
+        if carry is not None:
+            chunk = pd.concat([carry, chunk])
+        if chunk.empty:
+            carry = None
+            continue
+        last_invoice = chunk["Invoice"].iloc[-1]
+        tail = (chunk["Invoice"] == last_invoice).to_numpy()
+        carry, chunk = chunk[tail], chunk[~tail]
+        if not chunk.empty:
+            yield chunk["Invoice"].to_numpy(), chunk[item_col].to_numpy(), chunk["Quantity"].to_numpy()
+    if carry is not None and not carry.empty:
+        yield carry["Invoice"].to_numpy(), carry[item_col].to_numpy(), carry["Quantity"].to_numpy()
+
+
+def preprocess_csv(path, country="Germany", item_col='StockCode', chunksize=100_000, **read_csv_kwargs):
+    # Chunked equivalent of preprocessData(pd.read_csv(path)) for exports too large to load
+    thresholds = scan_thresholds(path, chunksize=chunksize, **read_csv_kwargs)
+    encoder = BasketEncoder()
+    for invoices, items, quantities in iter_basket_batches(path, thresholds, country, item_col, chunksize, **read_csv_kwargs):
+        encoder.partial_fit(invoices, items, quantities)
+    return encoder.to_df(columns_name=item_col)
@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from urllib.parse import quote
+
+import numpy as np
+
+from service import load_rule_set
+
+
+def sample_baskets(rule_set, n_baskets, seed=0):
+    # Query baskets built from a random rule's antecedent plus one random product, so
+    # most of them match rules the way real baskets would
+    rng = np.random.default_rng(seed)
+    index = rule_set.index
+    items = index.items
+    if len(index) == 0:
+        return [[items[code]] for code in rng.integers(0, len(items), n_baskets)] if len(items) else [[]] * n_baskets
+
+    # Antecedent item codes in rule order, rebuilt from the posting lists
+    item_of_posting = np.repeat(np.arange(len(items)), np.diff(index.posting_ptr))
+    antecedent_items = item_of_posting[np.argsort(index.posting_rules, kind='stable')]
+    antecedent_ptr = np.concatenate(([0], np.cumsum(index.antecedent_size)))
+
+    baskets = []
+    for rule in rng.integers(0, len(index), n_baskets):
+        codes = set(antecedent_items[antecedent_ptr[rule]:antecedent_ptr[rule + 1]].tolist())
+        codes.add(int(rng.integers(0, len(items))))
+        baskets.append([items[code] for code in codes])
+    return baskets
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed by server")
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    body = await reader.readexactly(length)
+    return int(status_line.split()[1]), body
+
+
+async def _client(host, port, requests, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for target in requests:
+            start = time.perf_counter()
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+            await writer.drain()
+            status, _ = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def _get_json(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode('latin-1'))
+        await writer.drain()
+        _, body = await _read_response(reader)
+        return json.loads(body)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, baskets, n, connections):
+    targets = [f"/recommend?products={quote(','.join(basket))}&n={n}" for basket in baskets]
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*[_client(host, port, targets[c::connections], latencies, errors)
+                           for c in range(connections)])
+    elapsed = time.perf_counter() - start
+    server = await _get_json(host, port, '/metrics')
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'connections': connections,
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed if elapsed else None,
+        'client_p50_ms': float(np.percentile(latencies_ms, 50)) if len(latencies) else None,
+        'client_p99_ms': float(np.percentile(latencies_ms, 99)) if len(latencies) else None,
+        'server': server.get('/recommend'),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test a running recommendation service and report p50/p99")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--rules', default='rule_set.npz', help="rule set the service runs, used to build query baskets")
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--n', type=int, default=5, help="recommendations per query")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    baskets = sample_baskets(load_rule_set(args.rules), args.requests, args.seed)
+    report = asyncio.run(run_load(args.host, args.port, baskets, args.n, args.connections))
+    print(json.dumps(report, indent=2))
+    print(f"{report['requests']} requests in {report['seconds']:.2f}s "
+          f"({report['requests_per_second']:.0f} req/s): p50 {report['client_p50_ms']:.2f} ms, "
+          f"p99 {report['client_p99_ms']:.2f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
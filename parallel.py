@@ -0,0 +1,64 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def resolve_n_jobs(n_jobs):
+    # n_jobs=None or below 1 (e.g. -1) means one job per core
+    if n_jobs is None or n_jobs < 1:
+        return os.cpu_count() or 1
+    return n_jobs
+
+
+class SharedArrays:
+    # Named numpy arrays copied into shared memory blocks. Workers attach to them by
+    # name through spec(), so large arrays reach every process without being pickled.
+
+    def __init__(self, **arrays):
+        self.blocks = {}
+        self.specs = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            self.blocks[name] = block
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    def spec(self):
+        return self.specs
+
+    def close(self):
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# State of the current worker process: the pool initializer's keyword arguments plus
+# one array per shared block, attached once and kept open for the process lifetime
+worker = {}
+
+
+def _init_worker(state, specs):
+    worker.clear()
+    worker.update(state)
+    blocks = {}
+    for name, (block_name, shape, dtype) in specs.items():
+        blocks[name] = shared_memory.SharedMemory(name=block_name)
+        worker[name] = np.ndarray(shape, dtype=dtype, buffer=blocks[name].buf)
+    worker['_blocks'] = blocks
+
+
+def worker_pool(n_workers, shared=None, **state):
+    # Process pool whose workers find `state` and the arrays of `shared` (a SharedArrays)
+    # in parallel.worker, so tasks only carry their own small arguments
+    specs = shared.spec() if shared is not None else {}
+    return ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(state, specs))
@@ -0,0 +1,153 @@
+import contextvars
+import json
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+
+# tracemalloc is process-wide: it runs while at least one tracer records memory. With
+# several sessions tracing at once their peak_bytes figures overlap.
+_memory_lock = threading.Lock()
+_memory_users = 0
+_memory_started = False
+
+
+def _acquire_tracemalloc():
+    global _memory_users, _memory_started
+    with _memory_lock:
+        if _memory_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _memory_started = True
+        _memory_users += 1
+
+
+def _release_tracemalloc():
+    global _memory_users, _memory_started
+    with _memory_lock:
+        _memory_users -= 1
+        if _memory_users == 0 and _memory_started:
+            tracemalloc.stop()
+            _memory_started = False
+
+
+class _NullStage:
+    # Shared stand-in while tracing is off: entering, leaving and setting counts do nothing
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setitem__(self, key, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+
+    def __init__(self, tracer, name, counts):
+        self.tracer = tracer
+        self.record = {'stage': name, 'depth': 0, **counts}
+        self.peak_seen = 0
+
+    def __setitem__(self, key, value):
+        # Row / itemset / rule counts known only once the stage has run
+        self.record[key] = value
+
+    def __enter__(self):
+        stack = self.tracer.stack
+        self.record['depth'] = len(stack)
+        if self.tracer.memory:
+            self.start_bytes, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak_seen = max(stack[-1].peak_seen, peak)
+            tracemalloc.reset_peak()
+        stack.append(self)
+        self.tracer.records.append(self.record)
+        self.start_cpu = time.process_time()
+        self.start_wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.record['wall_s'] = time.perf_counter() - self.start_wall
+        self.record['cpu_s'] = time.process_time() - self.start_cpu
+        if self.tracer.memory:
+            # The tracemalloc peak is not reset on exit, so enclosing stages still see it
+            peak = max(self.peak_seen, tracemalloc.get_traced_memory()[1])
+            self.record['peak_bytes'] = peak - self.start_bytes
+        self.tracer.stack.pop()
+        return False
+
+
+class Tracer:
+    # Opt-in per-stage instrumentation. Code wraps its stages in
+    #     with tracer.stage('mining') as stage:
+    #         ...
+    #         stage['itemsets'] = len(frequent_itemsets)
+    # and every run records wall time, CPU time, peak traced memory and the counts set
+    # on the stage. While disabled, stage() hands back one shared no-op object.
+
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.records = []
+        self.stack = []
+
+    def enable(self, memory=True):
+        if memory and not self.memory:
+            _acquire_tracemalloc()
+        elif not memory and self.memory:
+            _release_tracemalloc()
+        self.enabled = True
+        self.memory = memory
+
+    def disable(self):
+        if self.memory:
+            _release_tracemalloc()
+        self.enabled = False
+        self.memory = False
+
+    def clear(self):
+        self.records = []
+
+    def stage(self, name, **counts):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, counts)
+
+    def to_frame(self):
+        return pd.DataFrame(self.records)
+
+    def to_json(self, path=None):
+        payload = json.dumps(self.records, indent=2, default=str)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(payload)
+        return payload
+
+
+class _CurrentTracer:
+    # Stands in for whichever Tracer use_tracer() made current in this context (each
+    # Streamlit session's script thread sets its own), or a process default otherwise
+
+    def __getattr__(self, name):
+        return getattr(_current.get(_default), name)
+
+
+_default = Tracer()
+_current = contextvars.ContextVar('tracer')
+
+
+def use_tracer(instance):
+    # Route `tracer` to instance for the rest of this thread / task
+    _current.set(instance)
+    return instance
+
+
+# What apriori, fp_growth and the Streamlit apps report to
+tracer = _CurrentTracer()
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from rules import as_rule_table
+
+ITEMSET_SORT_KEYS = ('support',)
+RULE_SORT_KEYS = ('confidence', 'support', 'lift')
+
+
+class ResultView:
+    # Paged view over mining results. Itemsets and rules stay columnar (a support array,
+    # a RuleTable); strings are only formatted for the rows of the page asked for, and
+    # each sort key's argsort is computed once and reused for every page.
+
+    def __init__(self, frequent_itemsets, rules):
+        self.itemsets = frequent_itemsets['itemsets'].to_numpy(dtype=object)
+        self.supports = frequent_itemsets['support'].to_numpy(dtype=np.float64)
+        self.rules = as_rule_table(rules)
+        self.orders = {}
+        for column in ITEMSET_SORT_KEYS:
+            self._order('itemsets', column, False)
+        for column in RULE_SORT_KEYS:
+            self._order('rules', column, False)
+
+    @property
+    def n_itemsets(self):
+        return len(self.supports)
+
+    @property
+    def n_rules(self):
+        return len(self.rules)
+
+    def _order(self, table, column, ascending):
+        key = (table, column, ascending)
+        if key not in self.orders:
+            values = self.supports if table == 'itemsets' else self.rules.metrics[column]
+            self.orders[key] = np.argsort(values if ascending else -values, kind='stable')
+        return self.orders[key]
+
+    @staticmethod
+    def n_pages(n_rows, page_size):
+        return max(1, -(-n_rows // page_size))
+
+    def itemsets_page(self, page=0, page_size=10, sort_by='support', ascending=False):
+        start = page * page_size
+        positions = self._order('itemsets', sort_by, ascending)[start:start + page_size]
+        lines = [f"itemset: {set(itemset)}, support: {support:.3f}"
+                 for itemset, support in zip(self.itemsets[positions], self.supports[positions])]
+        return pd.DataFrame(lines, index=pd.RangeIndex(start, start + len(lines)))
+
+    def rules_page(self, page=0, page_size=10, sort_by='confidence', ascending=False):
+        start = page * page_size
+        page_rules = self.rules.take(self._order('rules', sort_by, ascending)[start:start + page_size])
+        lines = [f"Rule: {set(antecedents)} ==> {set(consequents)},support : {support:.3f}, confidence: {confidence:.3f}"
+                 for antecedents, consequents, support, confidence in zip(
+                     page_rules.itemsets('antecedents'), page_rules.itemsets('consequents'),
+                     page_rules.metrics['support'], page_rules.metrics['confidence'])]
+        return pd.DataFrame(lines, index=pd.RangeIndex(start, start + len(lines)))
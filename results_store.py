@@ -0,0 +1,31 @@
+from rules import generate_rules
+
+
+def filter_results(frequent_itemsets, sorted_rules, minSupport, minConfidence):
+    # Itemsets frequent at a higher support are a subset of those at a lower one, and
+    # every rule's support is the support of the itemset it was generated from.
+    itemsets = frequent_itemsets[frequent_itemsets['support'] >= minSupport]
+    rules = sorted_rules[(sorted_rules['support'] >= minSupport) & (sorted_rules['confidence'] >= minConfidence)]
+    return itemsets, rules
+
+
+class MiningResultsStore:
+    # Keeps the lowest-support result mined so far for one dataset and answers any
+    # query at or above that floor by filtering; run_func only runs below the floor.
+
+    def __init__(self, run_func):
+        self.run_func = run_func
+        self.min_support = None
+        self.min_confidence = None
+        self.frequent_itemsets = None
+        self.sorted_rules = None
+
+    def query(self, data, minSupport, minConfidence):
+        if self.min_support is None or minSupport < self.min_support:
+            self.frequent_itemsets, self.sorted_rules = self.run_func(data, minSupport, minConfidence)
+            self.min_support, self.min_confidence = minSupport, minConfidence
+        elif minConfidence < self.min_confidence:
+            # The itemsets still cover the query, only the rules need a lower threshold
+            self.sorted_rules = generate_rules(self.frequent_itemsets, min_confidence=minConfidence).sort_by("confidence", ascending=False)
+            self.min_confidence = minConfidence
+        return filter_results(self.frequent_itemsets, self.sorted_rules, minSupport, minConfidence)
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from basket import basket_matrix
+from parallel import resolve_n_jobs, worker, worker_pool
+from rules import as_rule_table, gather_ranges
+
+BATCH_CHUNK = 8192
+
+
+class RuleIndex:
+    # Compiled form of a rules table for recommendation lookups. Rules are kept in
+    # descending confidence order, antecedents are stored as an inverted index
+    # item -> rule ids and consequents as flat arrays, so a query never touches pandas.
+
+    def __init__(self, rules):
+        # Stable, so rules with equal confidence keep the order of the rules table
+        table = as_rule_table(rules).sort_by('confidence', ascending=False)
+        self.confidence = table.metrics['confidence']
+        self.items = table.items
+        self.codes = {item: code for code, item in enumerate(self.items)}
+        n_rules = len(table)
+
+        self.antecedent_size = np.diff(table.antecedent_ptr)
+        rule_ids = np.repeat(np.arange(n_rules), self.antecedent_size)
+        item_codes = table.antecedent_items.astype(np.int64)
+        by_item = np.argsort(item_codes, kind='stable')
+        self.posting_rules = rule_ids[by_item]
+        self.posting_ptr = np.searchsorted(item_codes[by_item], np.arange(len(self.items) + 1))
+
+        self.consequent_ptr = table.consequent_ptr
+        self.consequent_items = table.consequent_items.astype(np.int64)
+
+        # The posting lists are already the item x rule antecedent incidence in CSR form
+        self.antecedent_incidence = sparse.csr_matrix(
+            (np.ones(len(self.posting_rules), dtype=np.int32), self.posting_rules, self.posting_ptr),
+            shape=(len(self.items), n_rules),
+        )
+
+    def __len__(self):
+        return len(self.confidence)
+
+    def matching_rules(self, input_products):
+        # Rule ids (in confidence order) whose antecedent is a subset of input_products
+        codes = np.unique([self.codes[item] for item in set(input_products) if item in self.codes])
+        if len(codes) == 0 or len(self) == 0:
+            return np.empty(0, dtype=np.int64)
+        hits = np.concatenate([self.posting_rules[self.posting_ptr[c]:self.posting_ptr[c + 1]] for c in codes])
+        matched = np.bincount(hits, minlength=len(self))
+        return np.flatnonzero(matched == self.antecedent_size)
+
+    def recommend(self, input_products, num_of_products):
+        rules = self.matching_rules(input_products)
+        if len(rules) == 0:
+            return []
+        ptr, items = gather_ranges(self.consequent_ptr, self.consequent_items, rules)
+        confidence = np.repeat(self.confidence[rules], np.diff(ptr))
+
+        # First occurrence of each product is its highest-confidence recommendation
+        _, first = np.unique(items, return_index=True)
+        first = np.sort(first)[:num_of_products]
+        return [(self.items[items[i]], confidence[i]) for i in first]
+
+
+    def recommend_matrix(self, baskets, num_of_products):
+        # recommend() for every row of a basket x rule-item matrix at once. Returns
+        # (row, item code, confidence) arrays, rows ascending and each row's products in
+        # the order recommend() gives them.
+        empty = np.empty(0, dtype=np.int64)
+        if len(self) == 0 or baskets.shape[0] == 0:
+            return empty, empty, np.empty(0)
+        shared = (baskets.astype(np.int32) @ self.antecedent_incidence).tocoo()
+        matched = shared.data == self.antecedent_size[shared.col]
+        rows, rules = shared.row[matched].astype(np.int64), shared.col[matched].astype(np.int64)
+        # Rule ids are in confidence order, so (row, rule) order is recommend()'s scan order
+        order = np.lexsort((rules, rows))
+        rows, rules = rows[order], rules[order]
+
+        ptr, items = gather_ranges(self.consequent_ptr, self.consequent_items, rules)
+        sizes = np.diff(ptr)
+        rows = np.repeat(rows, sizes)
+        confidence = np.repeat(self.confidence[rules], sizes)
+
+        # First occurrence of each (row, product) is its highest-confidence recommendation
+        _, first = np.unique(rows * len(self.items) + items, return_index=True)
+        first = np.sort(first)
+        rows, items, confidence = rows[first], items[first], confidence[first]
+        starts = np.searchsorted(rows, rows)
+        keep = np.arange(len(rows)) - starts < num_of_products
+        return rows[keep], items[keep], confidence[keep]
+
+
+def _recommend_chunk(args):
+    baskets, num_of_products = args
+    return worker['index'].recommend_matrix(baskets, num_of_products)
+
+
+def recommend_batch(rules, baskets, num_of_products, chunk_size=BATCH_CHUNK, n_jobs=1):
+    # Recommendations for many baskets at once. baskets is a (sparse) basket DataFrame as
+    # built by create_invoice_product_df; it is processed chunk_size rows at a time to
+    # bound memory, optionally over n_jobs processes. Returns one (basket, product, score)
+    # row per recommendation, each basket's rows in recommend() order.
+    index = as_rule_index(rules)
+    matrix = basket_matrix(baskets)
+    labels, products = baskets.index, baskets.columns
+
+    # Project the basket columns onto the rule items; products no rule mentions drop out
+    columns = np.array([index.codes.get(product, -1) for product in products], dtype=np.int64)
+    known = np.flatnonzero(columns >= 0)
+    projection = sparse.csr_matrix(
+        (np.ones(len(known), dtype=np.int32), (known, columns[known])),
+        shape=(matrix.shape[1], len(index.items)),
+    )
+    matrix = (matrix.astype(np.int32) @ projection).tocsr()
+
+    chunks = [(matrix[start:start + chunk_size], num_of_products)
+              for start in range(0, matrix.shape[0], chunk_size)]
+    n_jobs = resolve_n_jobs(n_jobs)
+    if n_jobs == 1 or len(chunks) < 2:
+        results = [index.recommend_matrix(*chunk) for chunk in chunks]
+    else:
+        with worker_pool(min(n_jobs, len(chunks)), index=index) as executor:
+            results = list(executor.map(_recommend_chunk, chunks))
+
+    offsets = np.arange(len(chunks)) * chunk_size
+    rows = np.concatenate([np.empty(0, dtype=np.int64)] + [r[0] + o for r, o in zip(results, offsets)])
+    items = np.concatenate([np.empty(0, dtype=np.int64)] + [r[1] for r in results])
+    scores = np.concatenate([np.empty(0)] + [r[2] for r in results])
+    return pd.DataFrame({
+        'basket': labels[rows],
+        'product': index.items[items],
+        'score': scores,
+    })
+
+
+def as_rule_index(rules):
+    if isinstance(rules, RuleIndex):
+        return rules
+    return RuleIndex(rules)
@@ -0,0 +1,240 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+METRIC_COLUMNS = ('antecedent support', 'consequent support', 'support', 'confidence', 'lift')
+
+
+def _row_keys(rows):
+    # One fixed-width byte key per row; big-endian so byte order equals numeric order
+    rows = np.ascontiguousarray(rows, dtype='>i4')
+    return rows.view(np.dtype((np.void, 4 * max(rows.shape[1], 1)))).ravel()
+
+
+def gather_ranges(ptr, values, positions):
+    # CSR-style gather: concatenate values[ptr[p]:ptr[p + 1]] for every p in positions
+    starts = ptr[positions]
+    sizes = ptr[positions + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+    return np.concatenate(([0], np.cumsum(sizes))), values[offsets]
+
+
+def encode_itemsets(frequent_itemsets):
+    # Integer-encode an mlxtend style itemset table: items are numbered in sorted label
+    # order and itemsets are grouped by length as (rows, supports) with sorted codes.
+    itemsets = list(frequent_itemsets['itemsets'])
+    supports = frequent_itemsets['support'].to_numpy(dtype=np.float64)
+    items = np.array(sorted(set().union(*itemsets)), dtype=object) if itemsets else np.empty(0, dtype=object)
+    codes = {item: code for code, item in enumerate(items)}
+
+    by_length = {}
+    for position, itemset in enumerate(itemsets):
+        by_length.setdefault(len(itemset), []).append(position)
+    groups = {}
+    for length, positions in sorted(by_length.items()):
+        rows = np.array([sorted(codes[item] for item in itemsets[p]) for p in positions], dtype=np.int32)
+        groups[length] = (rows.reshape(len(positions), length), supports[positions])
+    return items, groups
+
+
+class SupportIndex:
+    # Itemset -> support lookup for integer-encoded itemsets. Each length keeps its rows
+    # as sorted byte keys, so a whole block of itemsets is resolved with one searchsorted.
+    # recover(rows) fills in itemsets that are not indexed, e.g. subsets of closed itemsets.
+
+    def __init__(self, groups, recover=None):
+        self.keys = {}
+        self.supports = {}
+        self.recover = recover
+        for length, (rows, supports) in groups.items():
+            keys = _row_keys(rows)
+            order = np.argsort(keys, kind='stable')
+            self.keys[length] = keys[order]
+            self.supports[length] = supports[order]
+
+    def lookup(self, rows):
+        # Supports of the given sorted code rows; NaN where the itemset is not indexed
+        length = rows.shape[1]
+        result = np.full(len(rows), np.nan)
+        if length in self.keys and len(rows):
+            keys = self.keys[length]
+            queries = _row_keys(rows)
+            positions = np.minimum(np.searchsorted(keys, queries), len(keys) - 1)
+            found = keys[positions] == queries
+            result[found] = self.supports[length][positions[found]]
+        missing = np.isnan(result)
+        if self.recover is not None and missing.any():
+            result[missing] = self.recover(rows[missing])
+        return result
+
+
+class RuleTable:
+    # Columnar association rules. Antecedents and consequents are CSR style integer
+    # arrays into `items`; frozensets of labels are only built when a caller asks for
+    # the 'antecedents' / 'consequents' columns or for to_frame().
+
+    def __init__(self, items, antecedent_ptr, antecedent_items, consequent_ptr, consequent_items, metrics):
+        self.items = items
+        self.antecedent_ptr = antecedent_ptr
+        self.antecedent_items = antecedent_items
+        self.consequent_ptr = consequent_ptr
+        self.consequent_items = consequent_items
+        self.metrics = metrics
+
+    @classmethod
+    def from_frame(cls, rules_df):
+        # Encode an mlxtend association_rules frame, keeping each frozenset's iteration order
+        antecedents = list(rules_df['antecedents'])
+        consequents = list(rules_df['consequents'])
+        items = pd.unique(np.array(
+            [item for itemset in antecedents + consequents for item in itemset], dtype=object))
+        codes = {item: code for code, item in enumerate(items)}
+
+        def encode(itemsets):
+            sizes = np.array([len(itemset) for itemset in itemsets], dtype=np.int64)
+            values = np.array([codes[item] for itemset in itemsets for item in itemset], dtype=np.int32)
+            return np.concatenate(([0], np.cumsum(sizes))), values
+
+        antecedent_ptr, antecedent_items = encode(antecedents)
+        consequent_ptr, consequent_items = encode(consequents)
+        metrics = {column: rules_df[column].to_numpy(dtype=np.float64)
+                   for column in METRIC_COLUMNS if column in rules_df.columns}
+        return cls(items, antecedent_ptr, antecedent_items, consequent_ptr, consequent_items, metrics)
+
+    def __len__(self):
+        return len(self.antecedent_ptr) - 1
+
+    @property
+    def columns(self):
+        return ['antecedents', 'consequents'] + list(self.metrics)
+
+    def take(self, positions):
+        positions = np.asarray(positions)
+        if positions.dtype == bool:
+            positions = np.flatnonzero(positions)
+        antecedent_ptr, antecedent_items = gather_ranges(self.antecedent_ptr, self.antecedent_items, positions)
+        consequent_ptr, consequent_items = gather_ranges(self.consequent_ptr, self.consequent_items, positions)
+        metrics = {column: values[positions] for column, values in self.metrics.items()}
+        return RuleTable(self.items, antecedent_ptr, antecedent_items, consequent_ptr, consequent_items, metrics)
+
+    def sort_by(self, column='confidence', ascending=True):
+        values = self.metrics[column]
+        order = np.argsort(values if ascending else -values, kind='stable')
+        return self.take(order)
+
+    def itemsets(self, side):
+        ptr, values = ((self.antecedent_ptr, self.antecedent_items) if side == 'antecedents'
+                       else (self.consequent_ptr, self.consequent_items))
+        labels = self.items[values]
+        return [frozenset(labels[ptr[i]:ptr[i + 1]]) for i in range(len(self))]
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key in ('antecedents', 'consequents'):
+                return pd.Series(self.itemsets(key), dtype=object, name=key)
+            return pd.Series(self.metrics[key], name=key)
+        return self.take(key)
+
+    def to_frame(self):
+        frame = pd.DataFrame({
+            'antecedents': self.itemsets('antecedents'),
+            'consequents': self.itemsets('consequents'),
+            **self.metrics,
+        })
+        # Derived measures association_rules also reports
+        frame['leverage'] = frame['support'] - frame['antecedent support'] * frame['consequent support']
+        with np.errstate(divide='ignore'):
+            frame['conviction'] = np.where(
+                frame['confidence'] < 1,
+                (1 - frame['consequent support']) / (1 - frame['confidence']),
+                np.inf,
+            )
+        return frame
+
+
+def as_rule_table(rules):
+    if isinstance(rules, RuleTable):
+        return rules
+    return RuleTable.from_frame(rules)
+
+
+def _empty_table(items):
+    empty_ptr = np.zeros(1, dtype=np.int64)
+    empty_items = np.empty(0, dtype=np.int32)
+    metrics = {column: np.empty(0) for column in METRIC_COLUMNS}
+    return RuleTable(items, empty_ptr, empty_items, empty_ptr.copy(), empty_items.copy(), metrics)
+
+
+def generate_rules(frequent_itemsets, min_confidence=0.0, min_lift=None, top_k=None, support_of=None):
+    # ap-genrules over the whole itemset table at once. For every itemset length the
+    # candidate consequents grow one position at a time; a consequent is only tried on
+    # the itemsets where all of its one-smaller sub-consequents passed, because
+    # confidence can only drop when items move from the antecedent to the consequent.
+    # With top_k, min_confidence is raised to the K-th best confidence found so far,
+    # which tightens that pruning as the search goes; only the K best rules are returned.
+    # For a closed or maximal itemset table, support_of(itemsets) supplies the supports
+    # of the antecedents and consequents the table leaves out.
+    items, groups = encode_itemsets(frequent_itemsets)
+    recover = None
+    if support_of is not None:
+        recover = lambda rows: support_of([tuple(items[row]) for row in rows])
+    index = SupportIndex(groups, recover)
+    antecedents, consequents, blocks = [], [], []
+    best = np.empty(0)
+
+    for length, (rows, supports) in groups.items():
+        if length < 2:
+            continue
+        passed = {(): np.ones(len(rows), dtype=bool)}
+        for size in range(1, length):
+            current = {}
+            for combo in itertools.combinations(range(length), size):
+                allowed = np.logical_and.reduce(
+                    [passed.get(sub, np.zeros(len(rows), dtype=bool))
+                     for sub in itertools.combinations(combo, size - 1)])
+                candidates = np.flatnonzero(allowed)
+                current[combo] = np.zeros(len(rows), dtype=bool)
+                if len(candidates) == 0:
+                    continue
+                rest = [p for p in range(length) if p not in combo]
+                antecedent_support = index.lookup(rows[candidates][:, rest])
+                confidence = supports[candidates] / antecedent_support
+                ok = confidence >= min_confidence
+                current[combo][candidates[ok]] = True
+
+                kept = candidates[ok]
+                consequent_support = index.lookup(rows[kept][:, list(combo)])
+                lift = confidence[ok] / consequent_support
+                if min_lift is not None:
+                    strong = lift >= min_lift
+                    kept, lift = kept[strong], lift[strong]
+                    antecedent_support, confidence = antecedent_support[ok][strong], confidence[ok][strong]
+                    consequent_support = consequent_support[strong]
+                else:
+                    antecedent_support, confidence = antecedent_support[ok], confidence[ok]
+                antecedents.append(rows[kept][:, rest])
+                consequents.append(rows[kept][:, list(combo)])
+                blocks.append((antecedent_support, consequent_support, supports[kept], confidence, lift))
+                if top_k is not None:
+                    best = np.concatenate((best, confidence))
+                    if len(best) >= top_k:
+                        best = np.partition(best, len(best) - top_k)[-top_k:]
+                        min_confidence = max(min_confidence, best.min())
+            passed = current
+
+    if not blocks:
+        return _empty_table(items)
+
+    def to_csr(parts):
+        sizes = np.concatenate([np.full(len(part), part.shape[1], dtype=np.int64) for part in parts])
+        values = np.concatenate([part.ravel() for part in parts]).astype(np.int32)
+        return np.concatenate(([0], np.cumsum(sizes))), values
+
+    antecedent_ptr, antecedent_items = to_csr(antecedents)
+    consequent_ptr, consequent_items = to_csr(consequents)
+    metrics = {column: np.concatenate([block[i] for block in blocks]) for i, column in enumerate(METRIC_COLUMNS)}
+    rules = RuleTable(items, antecedent_ptr, antecedent_items, consequent_ptr, consequent_items, metrics)
+    if top_k is not None:
+        rules = rules.sort_by('confidence', ascending=False).take(np.arange(min(top_k, len(rules))))
+    return rules
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from basket import basket_matrix, create_basket_df, item_bitmaps
+from eclat import eclat_bitmaps
+from fp_growth import clean_transactions
+from parallel import SharedArrays, resolve_n_jobs, worker, worker_pool
+from profiling import tracer
+from rules import generate_rules
+
+# Suggested min_invoices for callers that want to skip tiny segments, whose rules rest
+# on a handful of customers' baskets. The default mines every segment, so each key of
+# the input has an entry in the result.
+MIN_SEGMENT_INVOICES = 30
+# Segment keys computed from the transactions rather than read from a column
+DERIVED_KEYS = {'Month': lambda df: df['InvoiceDate'].dt.to_period('M').astype(str)}
+
+
+def segment_baskets(df, by=('Country',)):
+    # Clean and encode every transaction once. Returns the basket frame of all invoices
+    # and one row of segment keys per invoice, in basket order. A key is a column of df
+    # (e.g. a customer group column mapped from 'Customer ID') or one of DERIVED_KEYS.
+    df = clean_transactions(df)
+    keys = pd.DataFrame({column: DERIVED_KEYS[column](df) if column in DERIVED_KEYS else df[column]
+                         for column in by})
+    keys['Invoice'] = df['Invoice']
+    invoice_keys = keys.groupby('Invoice', sort=False).first()
+    with tracer.stage('encode', rows=len(df)):
+        basket_df = create_basket_df(df, item_col='StockCode')
+    return basket_df, invoice_keys.reindex(basket_df.index)
+
+
+def segment_rows(invoice_keys):
+    # Basket row positions of every segment, keyed by the key value (a tuple for several keys)
+    columns = list(invoice_keys.columns)
+    grouped = invoice_keys.reset_index(drop=True).groupby(columns[0] if len(columns) == 1 else columns)
+    return dict(sorted(grouped.indices.items()))
+
+
+def _row_mask(rows, n_words):
+    # Packed bitmap of the given rows, in the item_bitmaps layout
+    mask = np.zeros(n_words, dtype=np.uint64)
+    rows = rows.astype(np.uint64)
+    np.bitwise_or.at(mask, (rows >> np.uint64(6)).astype(np.int64), np.left_shift(np.uint64(1), rows & np.uint64(63)))
+    return mask
+
+
+def _mine_segment(bitmaps, items, mask, n_rows, minSupport, minConfidence, minLift):
+    found = eclat_bitmaps(bitmaps & mask, n_rows, minSupport)
+    frequent_itemsets = pd.DataFrame({
+        'support': np.array([count for count, _ in found], dtype=np.float64) / n_rows,
+        'itemsets': [frozenset(items[i] for i in itemset) for _, itemset in found],
+    })
+    rules = generate_rules(frequent_itemsets, min_confidence=minConfidence, min_lift=minLift)
+    return frequent_itemsets, rules.sort_by("confidence", ascending=False)
+
+
+def _mine_task(args):
+    key, mask, n_rows, minSupport, minConfidence, minLift = args
+    return key, _mine_segment(worker['bitmaps'], worker['items'], mask, n_rows, minSupport, minConfidence, minLift)
+
+
+def mine_segments(basket_df, invoice_keys, minSupport, minConfidence, minLift=None, n_jobs=1, min_invoices=1):
+    # Mine every segment from one set of item bitmaps: a segment is a row mask AND-ed
+    # onto the shared bitmaps, so no segment is re-encoded. Returns
+    # {segment: (frequent_itemsets, sorted_rules)}; segments with fewer than
+    # min_invoices invoices (e.g. MIN_SEGMENT_INVOICES) are left out.
+    bitmaps = item_bitmaps(basket_matrix(basket_df))
+    items = np.asarray(basket_df.columns, dtype=object)
+    tasks = [(key, _row_mask(rows, bitmaps.shape[1]), len(rows), minSupport, minConfidence, minLift)
+             for key, rows in segment_rows(invoice_keys).items() if len(rows) >= min_invoices]
+
+    n_jobs = resolve_n_jobs(n_jobs)
+    if n_jobs == 1 or len(tasks) < 2:
+        return {key: _mine_segment(bitmaps, items, *task) for key, *task in tasks}
+
+    with SharedArrays(bitmaps=bitmaps) as shared, \
+            worker_pool(min(n_jobs, len(tasks)), shared, items=items) as executor:
+        return dict(executor.map(_mine_task, tasks))
+
+
+def run_segmented(data, by, minSupport, minConfidence, minLift=None, n_jobs=1, min_invoices=1):
+    # Per-segment itemsets and rules (e.g. by=('Country',), ('Country', 'Month')) from the
+    # raw retail frame, with one cleaning and encoding pass for all segments
+    with tracer.stage('segment_baskets', rows=len(data)) as stage:
+        basket_df, invoice_keys = segment_baskets(data, by)
+        stage['invoices'], stage['products'] = basket_df.shape
+    with tracer.stage('mine_segments') as stage:
+        results = mine_segments(basket_df, invoice_keys, minSupport, minConfidence, minLift, n_jobs, min_invoices)
+        stage['segments'] = len(results)
+    return results
@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from catalog import ProductCatalog, as_catalog
+from rule_index import as_rule_index
+from rules import RuleTable, as_rule_table
+
+ROUTES = ('/recommend', '/reload', '/metrics', '/health')
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def save_rule_set(path, sorted_rules, catalog):
+    # Rules and catalog go in one .npz file, replaced atomically, so a reload never pairs
+    # a new rule set with an old catalog or reads a half-written file. The file holds
+    # plain arrays and a JSON catalog only, so loading it never unpickles anything.
+    table = as_rule_table(sorted_rules)
+    names = {str(product): None if pd.isna(name) else str(name)
+             for product, name in as_catalog(catalog).names.items()}
+    metric_names = list(table.metrics)
+    metrics = np.array([table.metrics[name] for name in metric_names], dtype=np.float64)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, scratch = tempfile.mkstemp(dir=directory, prefix='.rule_set-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(
+                f,
+                items=np.array([str(item) for item in table.items], dtype=str),
+                antecedent_ptr=table.antecedent_ptr,
+                antecedent_items=table.antecedent_items,
+                consequent_ptr=table.consequent_ptr,
+                consequent_items=table.consequent_items,
+                metric_names=np.array(metric_names, dtype=str),
+                metrics=metrics.reshape(len(metric_names), len(table)),
+                catalog=np.array(json.dumps(names)),
+            )
+        os.replace(scratch, path)
+    finally:
+        if os.path.exists(scratch):
+            os.remove(scratch)
+
+
+class RuleSet:
+    # A loaded rule set: the compiled RuleIndex plus a plain dict of product names
+    # (None where the catalog has no name), so a query never touches pandas
+
+    def __init__(self, sorted_rules, names, path=None):
+        self.index = as_rule_index(sorted_rules)
+        self.names = names
+        self.path = path
+        self.loaded_at = time.time()
+
+    def recommend(self, input_products, num_of_products):
+        # Same products, order and confidences as recommendation_system_func
+        return [{'ProductID': product, 'ProductName': self.names[product], 'Confidence': float(confidence)}
+                for product, confidence in self.index.recommend(input_products, num_of_products)
+                if product in self.names]
+
+
+def load_rule_set(path):
+    with np.load(path, allow_pickle=False) as archive:
+        metrics = dict(zip(archive['metric_names'].tolist(), archive['metrics']))
+        table = RuleTable(archive['items'].astype(object), archive['antecedent_ptr'], archive['antecedent_items'],
+                          archive['consequent_ptr'], archive['consequent_items'], metrics)
+        names = json.loads(str(archive['catalog']))
+    return RuleSet(table, names, path)
+
+
+class LatencyHistogram:
+    # Log-spaced buckets, ten per decade from 10us to 100s; quantiles report the upper
+    # bound of the bucket they fall in
+    BOUNDS = [10 ** (exponent / 10) for exponent in range(-50, 21)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        if self.total == 0:
+            return None
+        rank = q * self.total
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.BOUNDS[bucket] if bucket < len(self.BOUNDS) else float('inf')
+
+    def to_dict(self):
+        to_ms = lambda seconds: None if seconds is None else seconds * 1000
+        return {
+            'count': self.total,
+            'mean_ms': to_ms(self.sum / self.total) if self.total else None,
+            'p50_ms': to_ms(self.quantile(0.5)),
+            'p90_ms': to_ms(self.quantile(0.9)),
+            'p99_ms': to_ms(self.quantile(0.99)),
+            'buckets': [{'le_ms': to_ms(self.BOUNDS[bucket]) if bucket < len(self.BOUNDS) else None, 'count': count}
+                        for bucket, count in enumerate(self.counts) if count],
+        }
+
+
+class RecommendationService:
+    # Minimal HTTP/1.1 server on asyncio streams (keep-alive, Content-Length bodies).
+    #   GET  /recommend?products=ID1,ID2&n=5   (or POST a JSON {"products": [...], "n": 5})
+    #   POST /reload                           re-read the --rules file; SIGHUP does the same
+    #   GET  /metrics                          latency histograms per route
+    #   GET  /health
+    # Every request reads self.rule_set once; a reload builds the new RuleSet off the event
+    # loop and swaps the reference in one assignment, so queries see the old or the new set.
+
+    def __init__(self, path):
+        # Reloads only ever re-read this path; clients cannot point the server at other files
+        self.path = path
+        self.rule_set = load_rule_set(path)
+        self.histograms = defaultdict(LatencyHistogram)
+        self.reloads = 0
+        self._reload_lock = None
+
+    async def reload(self):
+        if self._reload_lock is None:
+            self._reload_lock = asyncio.Lock()
+        async with self._reload_lock:
+            rule_set = await asyncio.get_running_loop().run_in_executor(None, load_rule_set, self.path)
+            self.rule_set = rule_set
+            self.reloads += 1
+        return self._health()
+
+    def _health(self):
+        rule_set = self.rule_set
+        return {'status': 'ok', 'path': rule_set.path, 'rules': len(rule_set.index),
+                'products': len(rule_set.names), 'loaded_at': rule_set.loaded_at, 'reloads': self.reloads}
+
+    def _recommend(self, method, query, body):
+        # ValueError / TypeError raised here are answered with 400
+        if method == 'POST':
+            request = json.loads(body or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError("request body must be a JSON object")
+            products, n = request.get('products', []), request.get('n', 5)
+            if not isinstance(products, list) or not all(isinstance(p, str) for p in products):
+                raise ValueError("products must be a list of product ids")
+            if isinstance(n, bool) or not isinstance(n, int):
+                raise ValueError("n must be an integer")
+        else:
+            params = parse_qs(query)
+            products = [p for value in params.get('products', []) for p in value.split(',') if p]
+            n = int(params.get('n', ['5'])[0])
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        return {'recommendations': self.rule_set.recommend(products, n)}
+
+    async def handle(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == '/recommend' and method in ('GET', 'POST'):
+            return 200, self._recommend(method, url.query, body)
+        if url.path == '/reload' and method == 'POST':
+            return 200, await self.reload()
+        if url.path == '/metrics' and method == 'GET':
+            return 200, {route: histogram.to_dict() for route, histogram in sorted(self.histograms.items())}
+        if url.path == '/health' and method == 'GET':
+            return 200, self._health()
+        if url.path in ROUTES:
+            return 405, {'error': f"{method} not allowed on {url.path}"}
+        return 404, {'error': f"unknown path {url.path}"}
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        try:
+            # NaN / Infinity are not JSON; refuse them rather than send a body clients cannot parse
+            data = json.dumps(payload, allow_nan=False).encode('utf-8')
+        except ValueError as e:
+            status, data = 500, json.dumps({'error': str(e)}).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            .encode('latin-1') + data)
+        await writer.drain()
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                start = time.perf_counter()
+                try:
+                    method, target, version = request_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = line.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                    length = int(headers.get('content-length') or 0)
+                    if length < 0:
+                        raise ValueError(f"invalid Content-Length {length}")
+                except ValueError as e:
+                    # A request that cannot be framed leaves the rest of the stream unusable
+                    await self._respond(writer, 400, {'error': f"malformed request: {e}"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length)
+
+                try:
+                    status, payload = await self.handle(method, target, body)
+                except (ValueError, TypeError) as e:
+                    status, payload = 400, {'error': str(e)}
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, keep_alive)
+                # Unknown paths share one histogram so clients cannot grow the metrics without bound
+                path = urlsplit(target).path
+                self.histograms[path if path in ROUTES else 'other'].record(time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        loop = asyncio.get_running_loop()
+        if hasattr(signal, 'SIGHUP'):
+            loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(self.reload()))
+        server = await asyncio.start_server(self.serve_connection, host, port, backlog=1024)
+        print(f"Serving {len(self.rule_set.index)} rules on http://{host}:{port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+def export_rule_set(args):
+    # Mine a rule set from the workbook the Streamlit apps use and save it for serving
+    from fp_growth import preprocessData, run_fpgrowth
+
+    df = pd.read_excel(args.data, sheet_name=args.sheet)
+    df['StockCode'] = df['StockCode'].astype(str)
+    df['Invoice'] = df['Invoice'].astype(str)
+    # Built after preprocessData, as the apps do: its dropna(inplace=True) decides which
+    # row is the first one per StockCode, so names match recommendation_system_func
+    dataset = preprocessData(df, country=args.country)
+    catalog = ProductCatalog(df)
+    _, sorted_rules = run_fpgrowth(dataset, args.min_support, args.min_confidence)
+    save_rule_set(args.output, sorted_rules, catalog)
+    print(f"Saved {len(sorted_rules)} rules to {args.output}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve product recommendations from a mined rule set over HTTP")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help="serve a saved rule set")
+    serve.add_argument('--rules', default='rule_set.npz', help="rule set written by save_rule_set / export")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+
+    export = commands.add_parser('export', help="mine the workbook and save a rule set")
+    export.add_argument('--data', default='online_retail_II.xlsx')
+    export.add_argument('--sheet', default='Year 2010-2011')
+    export.add_argument('--country', default='Germany')
+    export.add_argument('--min-support', type=float, default=0.05)
+    export.add_argument('--min-confidence', type=float, default=0.01)
+    export.add_argument('--output', default='rule_set.npz')
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        export_rule_set(args)
+    else:
+        service = RecommendationService(args.rules)
+        try:
+            asyncio.run(service.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
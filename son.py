@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from mlxtend.frequent_patterns import apriori, fpgrowth
+
+from basket import basket_matrix, item_bitmaps, popcount
+from parallel import SharedArrays, resolve_n_jobs, worker, worker_pool
+
+ENGINES = {'apriori': apriori, 'fpgrowth': fpgrowth}
+# Local thresholds are lowered by a hair so float rounding can never drop a candidate
+# that the exact global count would accept; phase 2 removes the extras.
+LOCAL_SUPPORT_SLACK = 1e-9
+# Each partition is mined at min_support of its own rows. Too few rows make that local
+# count so small that every partition reports a flood of false candidates for phase 2,
+# so partitions are sized to need at least this many supporting rows each.
+MIN_LOCAL_COUNT = 32
+COUNT_BLOCK = 4096
+
+
+def _partition(start, stop):
+    # Rows start:stop of the shared basket matrix, copied out of the shared blocks
+    indptr, indices = worker['indptr'], worker['indices']
+    lo, hi = indptr[start], indptr[stop]
+    part_indices = indices[lo:hi].copy()
+    data = np.ones(len(part_indices), dtype=bool)
+    part_indptr = indptr[start:stop + 1] - lo
+    return sparse.csr_matrix((data, part_indices, part_indptr), shape=(stop - start, worker['n_columns']))
+
+
+def _local_candidates(args):
+    start, stop, engine, min_support = args
+    part = _partition(start, stop)
+    part_df = pd.DataFrame.sparse.from_spmatrix(part)
+    local = ENGINES[engine](part_df, min_support=min_support * (1 - LOCAL_SUPPORT_SLACK))
+    return [tuple(sorted(itemset)) for itemset in local['itemsets']]
+
+
+def count_candidates(matrix, candidates):
+    # Support counts of column-index tuples, by AND-ing the packed column bitmaps
+    return count_bitmap_candidates(item_bitmaps(matrix), candidates)
+
+
+def count_bitmap_candidates(bitmaps, candidates):
+    counts = np.zeros(len(candidates), dtype=np.int64)
+    by_length = {}
+    for position, itemset in enumerate(candidates):
+        by_length.setdefault(len(itemset), []).append(position)
+    for positions in by_length.values():
+        positions = np.array(positions)
+        for block in range(0, len(positions), COUNT_BLOCK):
+            chunk = positions[block:block + COUNT_BLOCK]
+            columns = np.array([candidates[p] for p in chunk])
+            joined = bitmaps[columns[:, 0]]
+            for k in range(1, columns.shape[1]):
+                joined = joined & bitmaps[columns[:, k]]
+            counts[chunk] = popcount(joined)
+    return counts
+
+
+def _global_counts(args):
+    start, stop, candidates = args
+    return count_candidates(_partition(start, stop), candidates)
+
+
+def son(df, engine='fpgrowth', min_support=0.5, use_colnames=False, n_jobs=-1):
+    # Savasere-Omiecinski-Navathe: mine each partition locally, then confirm the union of
+    # local results with one exact counting pass over all partitions.
+    n_jobs = resolve_n_jobs(n_jobs)
+    matrix = basket_matrix(df)
+    n_rows = matrix.shape[0]
+    n_partitions = max(1, min(n_jobs, int(n_rows * min_support // MIN_LOCAL_COUNT)))
+    if n_partitions == 1:
+        return ENGINES[engine](df, min_support=min_support, use_colnames=use_colnames)
+    bounds = np.linspace(0, n_rows, n_partitions + 1).astype(int)
+    partitions = list(zip(bounds[:-1], bounds[1:]))
+
+    indptr = matrix.indptr.astype(np.int64)
+    indices = matrix.indices.astype(np.int64)
+    with SharedArrays(indptr=indptr, indices=indices) as shared, \
+            worker_pool(n_partitions, shared, n_columns=matrix.shape[1]) as executor:
+        local = executor.map(_local_candidates, [
+            (start, stop, engine, min_support) for start, stop in partitions])
+        candidates = sorted(set().union(*local), key=lambda itemset: (len(itemset), itemset))
+        counts = sum(executor.map(_global_counts, [
+            (start, stop, candidates) for start, stop in partitions]),
+            np.zeros(len(candidates), dtype=np.int64))
+
+    supports = counts / n_rows
+    keep = supports >= min_support
+    columns = df.columns if use_colnames else range(df.shape[1])
+    itemsets = [frozenset(columns[i] for i in itemset) for itemset, kept in zip(candidates, keep) if kept]
+    return pd.DataFrame({'support': supports[keep], 'itemsets': itemsets})
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from basket import BasketEncoder, create_basket_df
+
+
+def groupby_baskets(dataframe, item_col):
+    # The encoding create_invoice_product_df used before the sparse encoder
+    return (dataframe.groupby(['Invoice', item_col])['Quantity'].sum().unstack().fillna(0) > 0).astype(int)
+
+
+def dense(basket_df):
+    return basket_df.sparse.to_dense().astype(int)
+
+
+@pytest.fixture(scope='module')
+def transactions():
+    # Repeated (invoice, item) lines, returns that cancel a purchase, and missing keys,
+    # including an invoice whose only line has no item
+    rng = np.random.default_rng(0)
+    n = 2000
+    invoices = rng.integers(0, 300, n).astype(str).astype(object)
+    items = rng.choice([f"item {i:02d}" for i in range(25)], n).astype(object)
+    items[rng.random(n) < 0.03] = np.nan
+    invoices[rng.random(n) < 0.01] = np.nan
+    frame = pd.DataFrame({'Invoice': invoices, 'Description': items,
+                          'Quantity': rng.integers(-3, 6, n).astype(float)})
+    only_missing = pd.DataFrame({'Invoice': ['only-nan'], 'Description': [np.nan], 'Quantity': [1.0]})
+    return pd.concat([frame, only_missing], ignore_index=True)
+
+
+def test_create_basket_df_matches_groupby(transactions):
+    expected = groupby_baskets(transactions, 'Description')
+    actual = dense(create_basket_df(transactions, item_col='Description'))
+    pd.testing.assert_frame_equal(actual, expected, check_names=False, check_dtype=False)
+
+
+def test_basket_encoder_matches_groupby(transactions):
+    encoder = BasketEncoder()
+    for start in range(0, len(transactions), 300):
+        batch = transactions.iloc[start:start + 300]
+        encoder.partial_fit(batch['Invoice'], batch['Description'], batch['Quantity'])
+    actual = dense(encoder.to_df(columns_name='Description'))
+    pd.testing.assert_frame_equal(actual, groupby_baskets(transactions, 'Description'),
+                                  check_names=False, check_dtype=False)
+
+
+def test_missing_item_does_not_leak_into_another_invoice():
+    frame = pd.DataFrame({'Invoice': ['1', '1', '2', '2'],
+                          'Description': ['apple', 'bread', np.nan, 'cake'],
+                          'Quantity': [1, 1, 1, 1]})
+    basket_df = dense(create_basket_df(frame, item_col='Description'))
+    assert basket_df.loc['1'].to_dict() == {'apple': 1, 'bread': 1, 'cake': 0}
+    assert basket_df.loc['2'].to_dict() == {'apple': 0, 'bread': 0, 'cake': 1}
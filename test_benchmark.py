@@ -0,0 +1,13 @@
+from benchmark import quest_transactions
+
+
+def test_quest_transactions_with_fewer_items_than_basket_length():
+    # The patterns cover at most 8 items, fewer than the ~12 a basket asks for
+    data = quest_transactions(50, 8, 12, n_patterns=5)
+    assert data['Invoice'].nunique() == 50
+    assert data.groupby('Invoice')['StockCode'].nunique().max() <= 8
+
+
+def test_quest_transactions_with_patterns_longer_than_item_count():
+    data = quest_transactions(20, 3, 2, n_patterns=4, avg_pattern_len=10)
+    assert data['StockCode'].nunique() <= 3
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from mlxtend.frequent_patterns import fpgrowth
+
+from conftest import MIN_CONFIDENCE, MIN_SUPPORT, rule_metrics, supports
+from condensed import closed_itemsets, condensed_itemsets
+from rules import generate_rules
+
+
+def test_closed_itemsets_match_fpgrowth(baskets):
+    # Closed = frequent itemsets with no proper superset of the same support
+    frequent = supports(fpgrowth(baskets, min_support=MIN_SUPPORT, use_colnames=True))
+    expected = {itemset: support for itemset, support in frequent.items()
+                if not any(itemset < other and np.isclose(support, frequent[other]) for other in frequent)}
+    actual = supports(closed_itemsets(baskets, min_support=MIN_SUPPORT, use_colnames=True))
+    assert set(actual) == set(expected)
+    for itemset, support in expected.items():
+        assert actual[itemset] == pytest.approx(support)
+
+
+@pytest.mark.parametrize('mode', ['closed', 'maximal'])
+def test_condensed_rules_match_full_rules(baskets, mode):
+    # Rules from a condensed table, with left-out supports recovered by support_of,
+    # are a subset of the rules from every frequent itemset, with the same metrics
+    itemsets, support_of = condensed_itemsets(baskets, MIN_SUPPORT, mode)
+    condensed = rule_metrics(generate_rules(itemsets, min_confidence=MIN_CONFIDENCE, support_of=support_of))
+    full = rule_metrics(generate_rules(fpgrowth(baskets, min_support=MIN_SUPPORT, use_colnames=True),
+                                       min_confidence=MIN_CONFIDENCE))
+    assert condensed and set(condensed) <= set(full)
+    for rule, metrics in condensed.items():
+        assert metrics == pytest.approx(full[rule])
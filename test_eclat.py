@@ -0,0 +1,14 @@
+from mlxtend.frequent_patterns import fpgrowth
+
+from conftest import MIN_SUPPORT, assert_same_itemsets
+from eclat import eclat
+
+
+def test_eclat_matches_fpgrowth(baskets):
+    assert_same_itemsets(eclat(baskets, min_support=MIN_SUPPORT, use_colnames=True),
+                         fpgrowth(baskets, min_support=MIN_SUPPORT, use_colnames=True))
+
+
+def test_eclat_max_len_matches_fpgrowth(baskets):
+    assert_same_itemsets(eclat(baskets, min_support=MIN_SUPPORT, use_colnames=True, max_len=2),
+                         fpgrowth(baskets, min_support=MIN_SUPPORT, use_colnames=True, max_len=2))
@@ -0,0 +1,28 @@
+import pytest
+from mlxtend.frequent_patterns import fpgrowth
+
+from conftest import MIN_CONFIDENCE, MIN_SUPPORT, assert_same_itemsets, rule_metrics
+from incremental import IncrementalMiner
+from rules import generate_rules
+
+
+@pytest.mark.parametrize('n_expired', [0, 100, 400])
+def test_incremental_update_matches_fpgrowth(baskets, n_expired):
+    # n_expired=400 expires more invoices than arrive, which takes the full re-mine path
+    miner = IncrementalMiner(baskets.iloc[:900], MIN_SUPPORT, MIN_CONFIDENCE)
+    frequent_itemsets, rules = miner.update(baskets.iloc[900:], expired_invoices=baskets.index[:n_expired])
+    history = baskets.iloc[n_expired:]
+    assert_same_itemsets(frequent_itemsets, fpgrowth(history, min_support=MIN_SUPPORT, use_colnames=True))
+    assert set(rule_metrics(rules)) == set(rule_metrics(generate_rules(
+        fpgrowth(history, min_support=MIN_SUPPORT, use_colnames=True), min_confidence=MIN_CONFIDENCE)))
+
+
+def test_successive_updates_match_fpgrowth(baskets):
+    # A sliding window: every batch appends 100 invoices and expires the oldest 50
+    miner = IncrementalMiner(baskets.iloc[:600], MIN_SUPPORT, MIN_CONFIDENCE)
+    for batch in range(6):
+        end = 600 + 100 * (batch + 1)
+        expired = baskets.index[50 * batch:50 * (batch + 1)]
+        frequent_itemsets, _ = miner.update(baskets.iloc[end - 100:end], expired_invoices=expired)
+        history = baskets.iloc[50 * (batch + 1):end]
+        assert_same_itemsets(frequent_itemsets, fpgrowth(history, min_support=MIN_SUPPORT, use_colnames=True))
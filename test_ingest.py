@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fp_growth import preprocessData
+from ingest import RETAIL_DTYPES, ValueCountSketch, preprocess_csv
+
+
+@pytest.fixture
+def retail_csv(tmp_path):
+    # Retail-shaped rows with cancellations, postage lines, missing values, outlier
+    # quantities and several countries; invoices are contiguous, as in the export
+    rng = np.random.default_rng(0)
+    n = 3000
+    invoice_numbers = np.sort(rng.integers(0, 400, n))
+    invoices = np.array([f"{'C' if number % 37 == 0 else ''}{500000 + number}" for number in invoice_numbers])
+    codes = rng.choice([f"2{i:04d}" for i in range(40)] + ['POST'], n)
+    quantities = rng.integers(1, 12, n).astype(float)
+    quantities[rng.random(n) < 0.01] = 5000.0
+    quantities[rng.random(n) < 0.01] = -2.0
+    frame = pd.DataFrame({
+        'Invoice': invoices,
+        'StockCode': codes,
+        'Description': ["POSTAGE" if code == 'POST' else f"product {code}" for code in codes],
+        'Quantity': quantities,
+        'Price': rng.choice([0.0, 0.85, 1.25, 2.95, 4.5], n),
+        'Customer ID': np.where(rng.random(n) < 0.05, np.nan, rng.integers(12000, 13000, n).astype(float)),
+        'Country': np.array(['Germany', 'France', 'Spain'])[invoice_numbers % 3],
+    })
+    path = tmp_path / 'retail.csv'
+    frame.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('country', ['Germany', None])
+def test_preprocess_csv_matches_preprocessData(retail_csv, country):
+    expected = preprocessData(pd.read_csv(retail_csv, dtype=RETAIL_DTYPES), country=country)
+    actual = preprocess_csv(retail_csv, country=country, chunksize=250)
+    assert expected.shape[0] > 0
+    pd.testing.assert_frame_equal(actual.sparse.to_dense().astype(int), expected.sparse.to_dense().astype(int),
+                                  check_names=False)
+
+
+def test_sketch_quantiles_match_series_quantile():
+    values = np.random.default_rng(1).integers(-20, 300, 5000).astype(float)
+    sketch = ValueCountSketch()
+    for chunk in np.array_split(values, 7):
+        sketch.update(chunk)
+    for q in (0.0, 0.01, 0.5, 0.99, 1.0):
+        assert sketch.quantile(q) == pytest.approx(pd.Series(values).quantile(q))
+    assert np.isnan(ValueCountSketch().quantile(0.5))
@@ -0,0 +1,68 @@
+import itertools
+
+import pytest
+from mlxtend.frequent_patterns import association_rules, fpgrowth
+
+from conftest import MIN_SUPPORT
+from rule_index import RuleIndex, recommend_batch
+from rules import generate_rules
+
+
+def iterrows_recommendation(input_products, num_of_products, rules_df):
+    # The recommender RuleIndex replaced: scan the sorted rules table row by row
+    recommendations = []
+    for _, rule in rules_df.iterrows():
+        if set(rule['antecedents']).issubset(set(input_products)):
+            for consequent in rule['consequents']:
+                recommendations.append((consequent, rule['confidence']))
+    recommendations = sorted(recommendations, key=lambda x: x[1], reverse=True)
+    unique_recommendations = {}
+    for product, confidence in recommendations:
+        if product not in unique_recommendations:
+            unique_recommendations[product] = confidence
+    return list(unique_recommendations.items())[:num_of_products]
+
+
+@pytest.fixture(scope='module')
+def sorted_rules(baskets):
+    frequent_itemsets = fpgrowth(baskets, min_support=MIN_SUPPORT, use_colnames=True)
+    return association_rules(frequent_itemsets, metric="confidence", min_threshold=0.0).sort_values(
+        "confidence", ascending=False)
+
+
+def queries(baskets):
+    products = list(baskets.columns)
+    return [list(query) for size in (1, 2, 3) for query in itertools.combinations(products, size)] + [['unknown']]
+
+
+def test_recommend_matches_iterrows(baskets, sorted_rules):
+    index = RuleIndex(sorted_rules)
+    for query in queries(baskets):
+        for num_of_products in (1, 5, 30):
+            assert index.recommend(query, num_of_products) == iterrows_recommendation(query, num_of_products, sorted_rules)
+
+
+def test_recommend_from_rule_table_matches_iterrows(baskets):
+    # generate_rules output, sorted as run_fpgrowth returns it
+    frequent_itemsets = fpgrowth(baskets, min_support=MIN_SUPPORT, use_colnames=True)
+    rules = generate_rules(frequent_itemsets).sort_by("confidence", ascending=False)
+    index, frame = RuleIndex(rules), rules.to_frame()
+    for query in queries(baskets):
+        assert index.recommend(query, 5) == iterrows_recommendation(query, 5, frame)
+
+
+@pytest.fixture(scope='module')
+def batch_expected(baskets, sorted_rules):
+    sample = baskets.iloc[:200]
+    return sample, {label: iterrows_recommendation(list(sample.columns[row.to_numpy()]), 5, sorted_rules)
+                    for label, row in sample.iterrows()}
+
+
+@pytest.mark.parametrize('chunk_size, n_jobs', [(8192, 1), (64, 1), (64, 2)])
+def test_recommend_batch_matches_iterrows(sorted_rules, batch_expected, chunk_size, n_jobs):
+    sample, expected = batch_expected
+    batch = recommend_batch(sorted_rules, sample, 5, chunk_size=chunk_size, n_jobs=n_jobs)
+    # Baskets come out in input order, each with recommend()'s products and scores
+    assert list(batch['basket'].unique()) == [label for label in sample.index if expected[label]]
+    actual = {label: list(zip(rows['product'], rows['score'])) for label, rows in batch.groupby('basket', sort=False)}
+    assert actual == {label: recommendations for label, recommendations in expected.items() if recommendations}
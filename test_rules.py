@@ -0,0 +1,36 @@
+import pytest
+from mlxtend.frequent_patterns import association_rules, fpgrowth
+
+from conftest import MIN_CONFIDENCE, MIN_SUPPORT, rule_metrics
+from rules import generate_rules
+
+
+@pytest.fixture(scope='module')
+def frequent_itemsets(baskets):
+    return fpgrowth(baskets, min_support=MIN_SUPPORT, use_colnames=True)
+
+
+@pytest.mark.parametrize('min_confidence', [0.0, MIN_CONFIDENCE, 0.6])
+def test_generate_rules_matches_association_rules(frequent_itemsets, min_confidence):
+    actual = rule_metrics(generate_rules(frequent_itemsets, min_confidence=min_confidence))
+    expected = rule_metrics(association_rules(frequent_itemsets, metric="confidence", min_threshold=min_confidence))
+    assert len(expected) > 0
+    assert set(actual) == set(expected)
+    for rule, metrics in expected.items():
+        assert actual[rule] == pytest.approx(metrics)
+
+
+def test_min_lift_matches_filtered_association_rules(frequent_itemsets):
+    expected = association_rules(frequent_itemsets, metric="confidence", min_threshold=MIN_CONFIDENCE)
+    expected = rule_metrics(expected[expected['lift'] >= 1.2])
+    actual = rule_metrics(generate_rules(frequent_itemsets, min_confidence=MIN_CONFIDENCE, min_lift=1.2))
+    assert expected and set(actual) == set(expected)
+
+
+def test_top_k_keeps_the_highest_confidence_rules(frequent_itemsets):
+    expected = association_rules(frequent_itemsets, metric="confidence", min_threshold=0.0)
+    border = expected['confidence'].nlargest(10).min()
+    rules = generate_rules(frequent_itemsets, top_k=10)
+    assert len(rules) == 10
+    assert rules.metrics['confidence'].min() == pytest.approx(border)
+    assert set(rule_metrics(rules)) <= set(rule_metrics(expected[expected['confidence'] >= border]))
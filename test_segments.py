@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import rule_metrics, supports
+from fp_growth import preprocessData, run_fpgrowth
+from segments import MIN_SEGMENT_INVOICES, run_segmented
+
+MIN_SUPPORT = 0.1
+MIN_CONFIDENCE = 0.2
+
+
+@pytest.fixture(scope='module')
+def transactions():
+    # Retail rows for three countries of very different size; Iceland has only 12 invoices
+    rng = np.random.default_rng(0)
+    countries = np.array(['Germany'] * 300 + ['France'] * 120 + ['Iceland'] * 12)
+    lines = rng.integers(2, 8, len(countries))
+    invoices = np.repeat(np.arange(len(countries)), lines)
+    codes = np.array([f"2{i:04d}" for i in range(15)])[
+        np.minimum(rng.geometric(0.18, len(invoices)) - 1, 14)]
+    return pd.DataFrame({
+        'Invoice': (500000 + invoices).astype(str),
+        'StockCode': codes,
+        'Description': np.char.add('ITEM ', codes),
+        'Quantity': rng.integers(1, 10, len(invoices)).astype(float),
+        'InvoiceDate': pd.Timestamp('2011-01-01'),
+        'Price': 1.25,
+        'Customer ID': 12345.0,
+        'Country': np.repeat(countries, lines),
+    })
+
+
+def test_run_segmented_matches_per_country_pipeline(transactions):
+    results = run_segmented(transactions.copy(), ('Country',), MIN_SUPPORT, MIN_CONFIDENCE)
+    assert set(results) == {'France', 'Germany', 'Iceland'}
+    for country, (frequent_itemsets, sorted_rules) in results.items():
+        expected_itemsets, expected_rules = run_fpgrowth(
+            preprocessData(transactions.copy(), country=country), MIN_SUPPORT, MIN_CONFIDENCE)
+        assert set(supports(frequent_itemsets)) == set(supports(expected_itemsets))
+        actual, expected = rule_metrics(sorted_rules), rule_metrics(expected_rules)
+        assert set(actual) == set(expected)
+        for rule, metrics in expected.items():
+            assert actual[rule] == pytest.approx(metrics)
+
+
+def test_min_invoices_is_opt_in(transactions):
+    results = run_segmented(transactions.copy(), ('Country',), MIN_SUPPORT, MIN_CONFIDENCE,
+                            min_invoices=MIN_SEGMENT_INVOICES)
+    assert set(results) == {'France', 'Germany'}
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+from mlxtend.frequent_patterns import fpgrowth
+
+from catalog import ProductCatalog
+from conftest import MIN_SUPPORT
+from rule_index import RuleIndex
+from rules import generate_rules
+from service import RecommendationService, load_rule_set, save_rule_set
+
+
+@pytest.fixture(scope='module')
+def sorted_rules(baskets):
+    frequent_itemsets = fpgrowth(baskets, min_support=MIN_SUPPORT, use_colnames=True)
+    return generate_rules(frequent_itemsets, min_confidence=0.1).sort_by("confidence", ascending=False)
+
+
+@pytest.fixture
+def rules_path(tmp_path, baskets, sorted_rules):
+    # P00 has no name in the catalog
+    catalog = ProductCatalog(pd.DataFrame({'StockCode': list(baskets.columns),
+                                           'Description': [None] + [f"product {c}" for c in baskets.columns[1:]]}))
+    path = tmp_path / 'rule_set.npz'
+    save_rule_set(str(path), sorted_rules, catalog)
+    return path
+
+
+def exchange(service, raw):
+    # Send raw bytes to a server on an ephemeral port; return (status, JSON body)
+    async def run():
+        server = await asyncio.start_server(service.serve_connection, '127.0.0.1', 0)
+        async with server:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(raw)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        head, _, body = response.partition(b'\r\n\r\n')
+        return int(head.split()[1]), json.loads(body)
+    return asyncio.run(run())
+
+
+def get(service, target):
+    return exchange(service, f"GET {target} HTTP/1.1\r\nConnection: close\r\n\r\n".encode('latin-1'))
+
+
+def post(service, target, body):
+    data = body.encode('utf-8')
+    return exchange(service, f"POST {target} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(data)}\r\n\r\n"
+                    .encode('latin-1') + data)
+
+
+def test_saved_rule_set_recommends_like_rule_index(rules_path, sorted_rules, baskets):
+    rule_set = load_rule_set(str(rules_path))
+    index = RuleIndex(sorted_rules)
+    for product in baskets.columns:
+        recommendations = rule_set.recommend([product], 5)
+        assert [(r['ProductID'], r['Confidence']) for r in recommendations] == \
+            [(p, float(c)) for p, c in index.recommend([product], 5)]
+
+
+def test_recommend_get_and_post(rules_path):
+    service = RecommendationService(str(rules_path))
+    status, payload = get(service, '/recommend?products=P01,P02&n=3')
+    assert status == 200 and len(payload['recommendations']) == 3
+    assert post(service, '/recommend', '{"products": ["P01", "P02"], "n": 3}') == (status, payload)
+    # A product without a name is served as null, never as NaN
+    status, payload = get(service, '/recommend?products=P01,P02&n=30')
+    names = {r['ProductID']: r['ProductName'] for r in payload['recommendations']}
+    assert names['P00'] is None and names['P02'] == 'product P02'
+
+
+@pytest.mark.parametrize('method, target, body', [
+    ('POST', '/recommend', '[1]'),
+    ('POST', '/recommend', '"P01"'),
+    ('POST', '/recommend', '{"products": "P01"}'),
+    ('POST', '/recommend', '{"products": [["P01"]]}'),
+    ('POST', '/recommend', '{"products": ["P01"], "n": "5"}'),
+    ('POST', '/recommend', '{"products": ["P01"], "n": 0}'),
+    ('POST', '/recommend', 'not json'),
+    ('GET', '/recommend?products=P01&n=-1', ''),
+    ('GET', '/recommend?products=P01&n=x', ''),
+])
+def test_invalid_recommend_requests_get_400(rules_path, method, target, body):
+    service = RecommendationService(str(rules_path))
+    status, payload = post(service, target, body) if method == 'POST' else get(service, target)
+    assert status == 400 and 'error' in payload
+
+
+@pytest.mark.parametrize('raw', [b'GARBAGE\r\n\r\n', b'GET /health HTTP/1.1\r\nContent-Length: -4\r\n\r\n',
+                                 b'GET /health HTTP/1.1\r\nContent-Length: x\r\n\r\n'])
+def test_malformed_requests_get_400(rules_path, raw):
+    status, payload = exchange(RecommendationService(str(rules_path)), raw)
+    assert status == 400 and 'error' in payload
+
+
+def test_reload_ignores_a_path_in_the_body(rules_path, tmp_path):
+    service = RecommendationService(str(rules_path))
+    other = tmp_path / 'other.npz'
+    status, payload = post(service, '/reload', json.dumps({'path': str(other)}))
+    assert status == 200 and payload['path'] == str(rules_path) and payload['reloads'] == 1
@@ -0,0 +1,18 @@
+import pytest
+from mlxtend.frequent_patterns import fpgrowth
+
+from conftest import MIN_SUPPORT, assert_same_itemsets
+from son import son
+
+
+@pytest.mark.parametrize('engine', ['fpgrowth', 'apriori'])
+def test_son_matches_fpgrowth(baskets, engine):
+    # 1200 rows at 6% support leave room for two partitions of MIN_LOCAL_COUNT supporting rows
+    assert_same_itemsets(son(baskets, engine, min_support=MIN_SUPPORT, use_colnames=True, n_jobs=2),
+                         fpgrowth(baskets, min_support=MIN_SUPPORT, use_colnames=True))
+
+
+def test_son_single_partition_falls_back_to_engine(baskets):
+    # Too few supporting rows for two partitions: the engine runs on the whole frame
+    assert_same_itemsets(son(baskets.iloc[:100], 'fpgrowth', min_support=MIN_SUPPORT, use_colnames=True, n_jobs=4),
+                         fpgrowth(baskets.iloc[:100], min_support=MIN_SUPPORT, use_colnames=True))
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+from mlxtend.frequent_patterns import fpgrowth
+
+from conftest import supports
+from eclat import eclat
+from topk import top_k_itemsets
+
+
+@pytest.mark.parametrize('min_len', [1, 2])
+def test_top_k_itemsets_match_fpgrowth(baskets, min_len):
+    k = 15
+    frequent = supports(fpgrowth(baskets, min_support=1 / len(baskets), use_colnames=True))
+    border = sorted((support for itemset, support in frequent.items() if len(itemset) >= min_len), reverse=True)[k - 1]
+    actual = supports(top_k_itemsets(baskets, k, min_len=min_len, use_colnames=True))
+    # Every itemset at or above the K-th best support (ties included), plus shorter
+    # subsets of those, which are at least as frequent
+    expected = {itemset for itemset, support in frequent.items() if support >= border - 1e-12}
+    assert set(actual) == expected
+    for itemset, support in actual.items():
+        assert support == pytest.approx(frequent[itemset])
+
+
+def test_min_support_floor_keeps_itemsets_at_the_threshold():
+    # 0.07 * 100 evaluates to 7.000000000000001; itemsets in exactly 7 of 100 invoices
+    # pass count / n_rows >= 0.07 and must not be dropped by the count floor
+    baskets = pd.DataFrame(np.random.default_rng(3).random((100, 10)) < 0.3)
+    expected = supports(eclat(baskets, min_support=0.07))
+    assert any(np.isclose(support, 0.07) for support in expected.values())
+    actual = supports(top_k_itemsets(baskets, len(expected) + 100, min_support=0.07))
+    assert set(actual) == set(expected)
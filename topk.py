@@ -0,0 +1,110 @@
+import heapq
+import math
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from basket import basket_matrix
+
+
+class _TopKBorder:
+    # Support count of the K-th best itemset seen so far (of length >= min_len); the
+    # mining loop prunes every branch whose count falls below it.
+
+    def __init__(self, k, min_len, floor):
+        self.k = k
+        self.min_len = min_len
+        self.floor = floor
+        self.heap = []
+        self.found = []
+
+    @property
+    def count(self):
+        return self.heap[0] if len(self.heap) >= self.k else self.floor
+
+    def record(self, itemset, count):
+        if count < self.count:
+            return
+        self.found.append((count, itemset))
+        if len(itemset) < self.min_len:
+            return
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, count)
+        elif count > self.heap[0]:
+            heapq.heapreplace(self.heap, count)
+
+
+def _mine(transactions, prefix, border):
+    # FP-growth on a conditional pattern base: transactions maps a tuple of item ranks
+    # (most frequent first) to its multiplicity.
+    counts = defaultdict(int)
+    containing = defaultdict(list)
+    for transaction, multiplicity in transactions.items():
+        for position, item in enumerate(transaction):
+            counts[item] += multiplicity
+            containing[item].append((transaction, position, multiplicity))
+
+    # Most frequent items first, so the border rises as early as possible
+    for item in sorted(counts, key=lambda item: (-counts[item], item)):
+        count = counts[item]
+        if count < border.count:
+            break
+        itemset = prefix + (item,)
+        border.record(itemset, count)
+
+        conditional = defaultdict(int)
+        for transaction, position, multiplicity in containing[item]:
+            path = tuple(other for other in transaction[:position] if counts[other] >= border.count)
+            if path:
+                conditional[path] += multiplicity
+        if conditional:
+            _mine(conditional, itemset, border)
+
+
+def min_count(min_support, n_rows):
+    # Smallest count passing count / n_rows >= min_support, the test eclat and apriori
+    # apply. ceil(min_support * n_rows) alone can overshoot by one on float noise:
+    # 0.07 * 100 == 7.000000000000001.
+    count = max(1, math.ceil(min_support * n_rows))
+    while count > 1 and (count - 1) / max(n_rows, 1) >= min_support:
+        count -= 1
+    while count / max(n_rows, 1) < min_support:
+        count += 1
+    return count
+
+
+def top_k_itemsets(df, k, min_len=1, min_support=0.0, use_colnames=False):
+    # The K most frequent itemsets of at least min_len items, without a support guess.
+    # The border starts at min_support and is raised to the K-th best count found so
+    # far, so the search never expands a branch that cannot enter the top K. Ties at
+    # the final border are kept, and every returned itemset's subsets are returned too
+    # (they are at least as frequent), so rules can be generated from the result.
+    matrix = basket_matrix(df)
+    n_rows = matrix.shape[0]
+    item_counts = np.asarray(matrix.sum(axis=0)).ravel()
+    floor = min_count(min_support, n_rows)
+
+    # Rank items by descending support; rank r stands for column ranked[r]
+    ranked = np.argsort(-item_counts, kind='stable')
+    rank_of = np.empty(len(ranked), dtype=np.int64)
+    rank_of[ranked] = np.arange(len(ranked))
+
+    transactions = defaultdict(int)
+    for row in range(n_rows):
+        columns = matrix.indices[matrix.indptr[row]:matrix.indptr[row + 1]]
+        ranks = np.sort(rank_of[columns[item_counts[columns] >= floor]])
+        if len(ranks):
+            transactions[tuple(ranks.tolist())] += 1
+
+    border = _TopKBorder(k, min_len, floor)
+    _mine(transactions, (), border)
+
+    final = border.count
+    found = sorted(((count, itemset) for count, itemset in border.found if count >= final),
+                   key=lambda entry: (-entry[0], len(entry[1]), sorted(entry[1])))
+    columns = df.columns if use_colnames else range(df.shape[1])
+    return pd.DataFrame({
+        'support': np.array([count for count, _ in found], dtype=np.float64) / max(n_rows, 1),
+        'itemsets': [frozenset(columns[ranked[r]] for r in itemset) for _, itemset in found],
+    })